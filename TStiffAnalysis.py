@@ -2,9 +2,25 @@
 #       IMPORTED MODULES
 # ----------------------------
 from dataclasses import dataclass, field 
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import ClassVar
+import os
+import time
 from TStiffElement import TStiffElement
 from TStiffNode import TStiffNode
+from TStiffModel import TStiffModel
+from TStiffSolver import TStiffSolver
+from TStiffOperator import TStiffOperator
+from TStiffKernel import global_stiffness, global_mass, global_geometric_stiffness, axial_forces
+from TStiffKernel import element_arrays, mass_arrays
+from TStiffStore import TStiffStore
+from TStiffProfiler import TStiffProfiler
+from TStiffCache import TStiffCache
+from tpanic import DebugStop
 import numpy as np 
+import scipy.sparse as sp
+from scipy.sparse.csgraph import reverse_cuthill_mckee
 
 @dataclass
 class TStiffAnalysis:
@@ -19,25 +35,124 @@ class TStiffAnalysis:
         - 'nodes_list': list containing each node of the structure
         - 'number_equations': total numbe of equation of the system
         - 'number_free_equations': number of equations used to find the displacements
+        - 'K00', 'K01', 'K11': free-free, free-constrained and constrained-constrained
+          blocks of 'KG' (K10 = K01^T), sparse when 'sparse'. A sparse 'KG' is only
+          kept as its blocks after the assembly
+        - 'reactions': support reactions K10 u0 + K11 u1 - F1 of the constrained 
+          equations, (n_constrained,) or (n_constrained, n_cases) (see 'node_reactions')
+        - 'sparse': assembles 'KG' as a sparse CSR matrix built from element triplets
+        - 'solver': factorization backend used for the free system (kept after 'Run')
+        - 'matrix_free': skips the assembly of 'KG', K00 is applied element by element
+          (TStiffOperator) and solved by the 'pcg' solver
+        - 'combinations': load combinations, {name: {load case: factor}}
+        - 'load_cases': named load cases found in the elements ('default' holds 'fel')
+        - 'element_stiffness': (n_elem, 6, 6) stack of element global stiffness matrices
+        - 'rotation_matrices': (n_elem, 6, 6) stack of element rotation matrices
+        - 'element_mass': (n_elem, 6, 6) stack of element global mass matrices
+          ('calc_element_mass', used by TStiffDynamic)
+        - 'element_geometric': geometric stiffness stack of the converged P-Delta
+          solution ('RunPDelta'), (n_elem, 6, 6) or (n_cases, n_elem, 6, 6)
+        - 'pdelta_report': residual, increment, refactorization and time of every
+          P-Delta iteration
+        - 'model': array-backed structure (TStiffModel), analysed instead of 'elements'
+        - 'element_equations': (n_elem, 6) equations of each element
+        - 'reorder': renumbers the free equations to reduce the bandwidth. Currently available:
+            * None: keeps the node order of 'nodes_list'
+            * 'rcm': Reverse Cuthill-McKee ordering
+        - 'reorder_report': bandwidth and profile of K00 before and after reordering
+        - 'update_limit': largest fraction of free equations touched by 'Reanalyse'
+          that is handled by a low-rank update instead of a new factorization
+        - 'reanalysis_report': method, rank and time of the last 'Reanalyse'
+        - 'element_displacements', 'element_solutions': element displacement and
+          reaction force stacks, (n_elem, 6) or (n_cases, n_elem, 6). The 'uel',
+          'solution', 'case_uel' and 'case_solution' of the elements are views into them
+        - 'scratch': directory of the disk-backed buffers of an out-of-core analysis
+          (model analyses only, implies 'sparse'). The element stacks, the stiffness
+          triplets, 'FG' and 'UG' are np.memmap arrays stored there as .npy files
+        - 'memory_budget': bytes of element working arrays held in memory at once by
+          an out-of-core analysis. 'KG' (assembled) and its factorization are not included
+        - 'cache': TStiffCache of element rotation/stiffness matrices. Elements with the
+          same (rounded) E, A, I, length and angle are evaluated once (None: no cache)
+        - 'profiler': TStiffProfiler receiving the timings of every phase and the
+          system counters (None: no instrumentation)
+        - 'workers': number of threads evaluating the element stiffness and building
+          the sparse 'KG' chunk by chunk (0 or 1: serial)
+        - 'chunk_size': elements per parallel chunk. The chunk matrices are summed in
+          a fixed order, so 'KG' does not depend on 'workers' or on thread timing
+
+    When load cases exist, 'FG' and 'UG' store one column per load case
+    followed by one column per combination (see 'case_names'), all solved
+    against a single factorization of K00.
     """
 #%% --------------------------
 #       INITIALIZER
 # ----------------------------
-    _elements: list[TStiffElement]
+    element_bytes: ClassVar[int] = 4096
+
+    _elements: list[TStiffElement] = field(default_factory=list)
+    _model: TStiffModel = None
+    _sparse: bool = False
+    _matrix_free: bool = False
+    _reorder: str = None
+    _update_limit: float = 0.05
+    _scratch: str = None
+    _memory_budget: int = 2**28
+    _cache: TStiffCache = None
+    _profiler: TStiffProfiler = None
+    _workers: int = 0
+    _chunk_size: int = 8192
+    _solver: TStiffSolver = field(default_factory=TStiffSolver)
+    _combinations: dict[str, dict[str, float]] = field(default_factory=dict)
+    _load_cases: list[str] = field(init=False, default_factory=list)
     _nodes_list: list[TStiffNode] = field(init=False, repr=False, default_factory=list)
     _number_equations: int = field(init=False, default=0)
     _number_free_equations: int = field(init=False)
     _FG: np.ndarray = field(init=False)
     _UG: np.ndarray = field(init=False)
-    _KG: np.ndarray = field(init=False)
+    _KG: np.ndarray | sp.csr_matrix = field(init=False)
+    _K00: np.ndarray | sp.csr_matrix = field(init=False, repr=False, default=None)
+    _K01: np.ndarray | sp.csr_matrix = field(init=False, repr=False, default=None)
+    _K11: np.ndarray | sp.csr_matrix = field(init=False, repr=False, default=None)
+    _reactions: np.ndarray = field(init=False, repr=False, default=None)
+    _triplets: tuple[list, list, list] = field(init=False, repr=False)
+    _element_stiffness: np.ndarray = field(init=False, repr=False, default=None)
+    _rotation_matrices: np.ndarray = field(init=False, repr=False, default=None)
+    _element_mass: np.ndarray = field(init=False, repr=False, default=None)
+    _element_geometric: np.ndarray = field(init=False, repr=False, default=None)
+    _pdelta_pattern: dict = field(init=False, repr=False, default=None)
+    _pdelta_report: list[dict] = field(init=False, default_factory=list)
+    _support_groups: dict[str, np.ndarray] = field(init=False, repr=False, default_factory=dict)
+    _node_equations: np.ndarray = field(init=False, repr=False, default=None)
+    _element_equations: np.ndarray = field(init=False, repr=False, default=None)
+    _element_displacements: np.ndarray = field(init=False, repr=False, default=None)
+    _reorder_report: dict[str, tuple[int, int]] = field(init=False, default_factory=dict)
+    _free_solution: np.ndarray = field(init=False, repr=False, default=None)
+    _update_equations: np.ndarray = field(init=False, repr=False, default=None)
+    _update_matrix: np.ndarray = field(init=False, repr=False, default=None)
+    _reanalysis_report: dict = field(init=False, default_factory=dict)
+    _element_solutions: np.ndarray = field(init=False, repr=False, default=None)
+    _triplet_buffers: tuple[np.memmap, ...] = field(init=False, repr=False, default=None)
+    _parallel_stiffness: tuple[sp.csr_matrix, ...] = field(init=False, repr=False, default=None)
 
     def __post_init__(self):
-        self.find_nodes()
-        self.find_equations()
-        self.FG = np.zeros(self.number_equations)
-        self.UG = np.zeros_like(self.FG)
-        self.KG = np.zeros((self.number_equations, self.number_equations))
-        
+        if self.out_of_core:
+            if self.model is None:
+                print("ERROR: out-of-core analyses need a TStiffModel (see TStiffModel.from_elements)")
+                DebugStop()
+            self.sparse = True
+
+        if self.model is None:
+            with self.phase("nodes"):
+                self.find_nodes()
+            with self.phase("equations"):
+                self.find_equations()
+        else:
+            with self.phase("equations"):
+                self.find_model_equations()
+
+        with self.phase("allocation"):
+            self.allocate_system()
+
 
 #%% --------------------------
 #       SETTERS & GETTERS
@@ -47,6 +162,150 @@ class TStiffAnalysis:
     @elements.setter
     def elements(self, elements: list[TStiffElement]): self._elements = elements
 
+    @property
+    def model(self): return self._model
+    @model.setter
+    def model(self, model: TStiffModel): self._model = model
+
+    @property
+    def node_equations(self): return self._node_equations
+    @node_equations.setter
+    def node_equations(self, equations: np.ndarray): self._node_equations = equations
+
+    @property
+    def element_equations(self): return self._element_equations
+    @element_equations.setter
+    def element_equations(self, equations: np.ndarray): self._element_equations = equations
+
+    @property
+    def element_displacements(self): return self._element_displacements
+    @element_displacements.setter
+    def element_displacements(self, uel: np.ndarray): self._element_displacements = uel
+
+    @property
+    def element_solutions(self): return self._element_solutions
+    @element_solutions.setter
+    def element_solutions(self, sol: np.ndarray): self._element_solutions = sol
+
+    @property
+    def matrix_free(self): return self._matrix_free
+    @matrix_free.setter
+    def matrix_free(self, is_matrix_free: bool): self._matrix_free = is_matrix_free
+
+    @property
+    def reorder(self): return self._reorder
+    @reorder.setter
+    def reorder(self, method: str): self._reorder = method
+
+    @property
+    def reorder_report(self): return self._reorder_report
+    @reorder_report.setter
+    def reorder_report(self, report: dict[str, tuple[int, int]]): self._reorder_report = report
+
+    @property
+    def update_limit(self): return self._update_limit
+    @update_limit.setter
+    def update_limit(self, fraction: float): self._update_limit = fraction
+
+    @property
+    def free_solution(self): return self._free_solution
+    @free_solution.setter
+    def free_solution(self, u0: np.ndarray): self._free_solution = u0
+
+    @property
+    def reanalysis_report(self): return self._reanalysis_report
+    @reanalysis_report.setter
+    def reanalysis_report(self, report: dict): self._reanalysis_report = report
+
+    @property
+    def scratch(self): return self._scratch
+    @scratch.setter
+    def scratch(self, directory: str): self._scratch = directory
+
+    @property
+    def memory_budget(self): return self._memory_budget
+    @memory_budget.setter
+    def memory_budget(self, nbytes: int): self._memory_budget = nbytes
+
+    @property
+    def out_of_core(self): return self.scratch is not None
+
+    @property
+    def cache(self): return self._cache
+    @cache.setter
+    def cache(self, cache: TStiffCache): self._cache = cache
+
+    @property
+    def profiler(self): return self._profiler
+    @profiler.setter
+    def profiler(self, profiler: TStiffProfiler): self._profiler = profiler
+
+    @property
+    def workers(self): return self._workers
+    @workers.setter
+    def workers(self, n: int): self._workers = n
+
+    @property
+    def chunk_size(self): return self._chunk_size
+    @chunk_size.setter
+    def chunk_size(self, size: int): self._chunk_size = size
+
+    @property
+    def parallel(self): return bool(self.workers) and self.workers > 1
+
+    @property
+    def sparse(self): return self._sparse
+    @sparse.setter
+    def sparse(self, is_sparse: bool): self._sparse = is_sparse
+
+    @property
+    def solver(self): return self._solver
+    @solver.setter
+    def solver(self, solver: TStiffSolver): self._solver = solver
+
+    @property
+    def combinations(self): return self._combinations
+    @combinations.setter
+    def combinations(self, combinations: dict[str, dict[str, float]]): self._combinations = combinations
+
+    @property
+    def load_cases(self): return self._load_cases
+    @load_cases.setter
+    def load_cases(self, cases: list[str]): self._load_cases = cases
+
+    @property
+    def case_names(self): return self.load_cases + list(self.combinations)
+
+    @property
+    def support_groups(self): return self._support_groups
+    @support_groups.setter
+    def support_groups(self, groups: dict[str, np.ndarray]): self._support_groups = groups
+
+    @property
+    def element_stiffness(self): return self._element_stiffness
+    @element_stiffness.setter
+    def element_stiffness(self, kel: np.ndarray): self._element_stiffness = kel
+
+    @property
+    def element_mass(self): return self._element_mass
+    @element_mass.setter
+    def element_mass(self, mel: np.ndarray): self._element_mass = mel
+
+    @property
+    def element_geometric(self): return self._element_geometric
+    @element_geometric.setter
+    def element_geometric(self, kg: np.ndarray): self._element_geometric = kg
+
+    @property
+    def pdelta_report(self): return self._pdelta_report
+    @pdelta_report.setter
+    def pdelta_report(self, report: list[dict]): self._pdelta_report = report
+
+    @property
+    def rotation_matrices(self): return self._rotation_matrices
+    @rotation_matrices.setter
+    def rotation_matrices(self, R: np.ndarray): self._rotation_matrices = R
+
     @property
     def nodes_list(self): return self._nodes_list
     @nodes_list.setter
@@ -73,31 +332,163 @@ class TStiffAnalysis:
     def UG(self, ug): self._UG = ug
 
     @property
-    def KG(self): return self._KG
+    def KG(self):
+        if self._KG is None and self.K00 is not None:
+            return sp.bmat([[self.K00, self.K01], [self.K01.T, self.K11]], format="csr")
+        return self._KG
     @KG.setter
     def KG(self, kg): self._KG = kg
+
+    @property
+    def K00(self): return self._K00
+
+    @property
+    def K01(self): return self._K01
+
+    @property
+    def K11(self): return self._K11
+
+    @property
+    def reactions(self): return self._reactions
+    @reactions.setter
+    def reactions(self, reactions): self._reactions = reactions
 #%% --------------------------
 #       CLASS METHODS
 # ----------------------------
     def find_nodes(self)->None:
         """
         Concatenates every node in the structure, making sure it 
-        only appears once
+        only appears once. Nodes are indexed by 'index', keeping the
+        order in which they first appear. Every node must belong to the 
+        same TStiffRegistry, since indices are only unique inside one
         """
+        registries = {id(node.registry) for node in self.nodes_list}
+        registries.update(id(element.registry) for element in self.elements)
+        if len(registries) > 1:
+            print("ERROR: the structure mixes nodes and elements of different registries")
+            DebugStop()
+
+        nodes = {node.index: node for node in self.nodes_list}
+
         for element in self.elements:
             for node in element.nodes:
-                if not any(n.index == node.index for n in self.nodes_list):
-                    self.nodes_list.append(node)
+                nodes.setdefault(node.index, node)
+
+        self.nodes_list = list(nodes.values())
 
     def find_equations(self)->None:
         """
         Find the total number of equations in the system and 
         the number of free equations used to solve the displacements
         """
+        self.group_supports()
         self.calc_free_equations()
         self.number_free_equations = self.number_equations
 
         self.calc_constrained_equations()
+        self.find_element_equations()
+
+        if self.reorder:
+            self.reorder_equations()
+
+    def find_element_equations(self)->None:
+        """
+        Gathers the equations of every element in the (n_elem, 6) 
+        'element_equations' array
+        """
+        for element in self.elements:
+            element.equations = element.get_element_equations()
+
+        self.element_equations = np.array([element.equations for element in self.elements], 
+                                          dtype=np.int64).reshape(-1, 6)
+
+    def free_pattern(self)->sp.csr_matrix:
+        """
+        Returns the sparsity pattern of K00 built from the element equations
+        """
+        n = self.number_free_equations
+        rows = np.repeat(self.element_equations, 6, axis=1).ravel()
+        cols = np.tile(self.element_equations, (1, 6)).ravel()
+        free = (rows < n) & (cols < n)
+
+        pattern = sp.csr_matrix((np.ones(free.sum()), (rows[free], cols[free])), shape=(n, n))
+        return pattern + sp.identity(n, format='csr')
+
+    @staticmethod
+    def bandwidth_and_profile(pattern:sp.spmatrix)->tuple[int, int]:
+        """
+        Returns the bandwidth (largest |i - j| of a nonzero) and the profile
+        (sum over the rows of the distance from the first nonzero to the
+        diagonal) of a symmetric sparsity 'pattern'
+        """
+        pattern = pattern.tocoo()
+        n = pattern.shape[0]
+        if pattern.nnz == 0:
+            return 0, 0
+
+        bandwidth = int(np.abs(pattern.row - pattern.col).max())
+
+        first = np.arange(n)
+        lower = pattern.col <= pattern.row
+        np.minimum.at(first, pattern.row[lower], pattern.col[lower])
+
+        return bandwidth, int((np.arange(n) - first).sum())
+
+    def reorder_equations(self)->None:
+        """
+        Renumbers the free equations with the 'reorder' method, keeping 
+        them before the constrained ones. Node, element and model 
+        equations are all updated
+        """
+        if self.reorder != "rcm":
+            print(f"ERROR: reordering method not defined ({self.reorder})")
+            DebugStop()
+
+        n = self.number_free_equations
+        if n == 0:
+            return
+
+        pattern = self.free_pattern()
+        permutation = reverse_cuthill_mckee(pattern, symmetric_mode=True)
+
+        new_equation = np.arange(self.number_equations)
+        new_equation[permutation] = np.arange(n)
+
+        before = self.bandwidth_and_profile(pattern)
+        after = self.bandwidth_and_profile(pattern[permutation][:, permutation])
+        self.reorder_report = {"bandwidth": (before[0], after[0]), "profile": (before[1], after[1])}
+
+        self.element_equations = new_equation[self.element_equations]
+
+        for element, equations in zip(self.elements, self.element_equations.tolist()):
+            element.equations = equations
+
+        for node in self.nodes_list:
+            node.DoF = [dof if np.isnan(dof) else int(new_equation[dof]) for dof in node.DoF]
+
+        if self.node_equations is not None:
+            self.node_equations = new_equation[self.node_equations]
+
+    def ordering_report(self)->str:
+        """
+        Returns a summary of the bandwidth and profile of K00 before and after reordering
+        """
+        if not self.reorder_report:
+            return "No reordering applied"
+
+        (b0, b1), (p0, p1) = self.reorder_report["bandwidth"], self.reorder_report["profile"]
+        return (f"{self.reorder}: bandwidth {b0} -> {b1}, profile {p0} -> {p1} "
+                f"({self.number_free_equations} free equations)")
+
+    def group_supports(self)->None:
+        """
+        Groups the positions of the nodes in 'nodes_list' by support type
+        """
+        groups = {}
+        for i, node in enumerate(self.nodes_list):
+            groups.setdefault(node.support_type, []).append(i)
+
+        self.support_groups = {support: np.array(ids) for support, ids in groups.items()}
 
     def set_node_DoF(self, node:TStiffNode, dof:list[int]):
         """
@@ -107,29 +498,45 @@ class TStiffAnalysis:
             node.DoF[i] = self.number_equations
             self.number_equations += 1
 
+    def set_group_DoF(self, support_equations:dict[str, list[int]], extra:np.ndarray = None)->np.ndarray:
+        """
+        Numbers the degrees of freedom listed in 'support_equations' for 
+        every support group at once, node after node in 'nodes_list' order.
+        'extra' reserves additional equations after each node's DoFs.
+        Returns the first equation reserved for each node's extra DoFs
+        """
+        counts = np.zeros(len(self.nodes_list), dtype=int)
+        for support, ids in self.support_groups.items():
+            counts[ids] = len(support_equations.get(support, []))
+
+        if extra is not None:
+            counts += extra
+
+        offsets = self.number_equations + np.cumsum(counts) - counts
+
+        for support, ids in self.support_groups.items():
+            for k, dof in enumerate(support_equations.get(support, [])):
+                for i, equation in zip(ids.tolist(), (offsets[ids] + k).tolist()):
+                    self.nodes_list[i].DoF[dof] = equation
+
+        self.number_equations += int(counts.sum())
+        return offsets + counts - (extra if extra is not None else 0)
+
     def calc_free_equations(self):
             """
             Calculates the number of free equations in the system
             """
             support_free_equations = {'Free': [0,1,2], 'RollerX': [0,2], 'RollerY': [1,2], 'Pinned': [2]}
 
-            for node in self.nodes_list:
-                if node.support_type == 'Free':
-                    self.set_node_DoF(node, support_free_equations['Free'])
-                
-                elif node.support_type == 'RollerX':
-                    self.set_node_DoF(node, support_free_equations['RollerX'])
-
-                elif node.support_type == 'RollerY':
-                    self.set_node_DoF(node, support_free_equations['RollerY'])
+            hinge_equations = np.array([max(node.number_of_connections-1, 0) if node.hinge else 0 
+                                        for node in self.nodes_list], dtype=int)
 
-                elif node.support_type == 'Pinned':
-                    self.set_node_DoF(node, support_free_equations['Pinned'])
+            first_hinge_equation = self.set_group_DoF(support_free_equations, hinge_equations)
 
-                if node.hinge:
-                    for _ in range(node.number_of_connections-1):
-                        node.DoF.append(self.number_equations)
-                        self.number_equations += 1
+            for i in np.flatnonzero(hinge_equations).tolist():
+                start = int(first_hinge_equation[i])
+                node = self.nodes_list[i]
+                node.DoF = node.DoF[:3] + list(range(start, start + int(hinge_equations[i])))
 
     def calc_constrained_equations(self):
             """
@@ -137,73 +544,1026 @@ class TStiffAnalysis:
             """
             support_constrained_equations = {'RollerX': [1], 'RollerY': [0], 'Pinned': [0,1], 'Fixed': [0,1,2]}
 
-            for node in self.nodes_list:
-                if node.support_type == 'RollerX':
-                    self.set_node_DoF(node, support_constrained_equations['RollerX'])
+            self.set_group_DoF(support_constrained_equations)
 
-                elif node.support_type == 'RollerY':
-                    self.set_node_DoF(node, support_constrained_equations['RollerY'])
+    def find_model_equations(self)->None:
+        """
+        Numbers the equations of an array-backed 'model' 
+        (see TStiffModel.number_equations)
+        """
+        (self.node_equations, self.element_equations, 
+         self.number_equations, self.number_free_equations) = self.model.number_equations()
+
+        if self.reorder:
+            self.reorder_equations()
+
+    def find_load_cases(self)->None:
+        """
+        Collects the named load cases applied to the elements, in order
+        of appearance. Unnamed loads ('fel') and prescribed displacements 
+        form the 'default' case
+        """
+        if self.model is not None:
+            cases = dict.fromkeys(self.model.case_loads)
+            default_loads = np.any(self.model.loads) or np.any(self.model.displacements[:, 2])
+        else:
+            cases = {}
+            for element in self.elements:
+                for case in element.case_loads:
+                    cases.setdefault(case)
+            default_loads = (any(np.any(element.fel) for element in self.elements) or
+                             any(value for node in self.nodes_list for _, value in node.nodal_displacement))
+
+        if cases and default_loads:
+            cases = {"default": None, **cases}
+
+        self.load_cases = list(cases)
+
+    def allocate_system(self)->None:
+        """
+        Finds the load cases and allocates 'FG', 'UG' and 'KG' for the
+        numbered equations. Results of a previous run are dropped
+        """
+        self.find_load_cases()
+        self.allocate_load_vectors()
+        self._triplets = ([], [], [])
+        self._parallel_stiffness = None
+        self.element_geometric = None
+        self.reactions = None
+
+        if self.matrix_free:
+            self.KG = None
+        elif self.sparse:
+            self.KG = sp.csr_matrix((self.number_equations, self.number_equations))
+        else:
+            self.KG = np.zeros((self.number_equations, self.number_equations))
+
+    def allocate_load_vectors(self)->None:
+        """
+        Allocates 'FG' and 'UG', with one column per load case and 
+        combination when load cases exist
+        """
+        shape = (self.number_equations, len(self.case_names)) if self.load_cases else self.number_equations
+
+        if self.out_of_core:
+            self.FG = self.scratch_array("FG", shape)
+            self.UG = self.scratch_array("UG", shape)
+            return
+
+        self.FG = np.zeros(shape)
+        self.UG = np.zeros_like(self.FG)
+
+    def add_combination(self, name:str, factors:dict[str, float])->None:
+        """
+        Adds the load combination 'name' = sum(factor * load case)
+        """
+        for case in factors:
+            if case not in self.load_cases:
+                print(f"ERROR: load case not defined ({case})")
+                DebugStop()
+
+        self.combinations[name] = factors
+        self.allocate_load_vectors()
+
+    def combination_matrix(self)->np.ndarray:
+        """
+        Returns the (number of load cases, number of combinations) matrix
+        of combination factors
+        """
+        factors = np.zeros((len(self.load_cases), len(self.combinations)))
+
+        for j, combination in enumerate(self.combinations.values()):
+            for case, factor in combination.items():
+                factors[self.load_cases.index(case), j] = factor
+
+        return factors
+
+    def element_loads(self, element:TStiffElement)->np.ndarray:
+        """
+        Returns the element load vector, or a (6, number of cases) array
+        with one column per load case and combination
+        """
+        if not self.load_cases:
+            return element.fel
+
+        loads = np.array([element.fel if case == "default" else element.case_loads.get(case, np.zeros(6)) 
+                          for case in self.load_cases]).T
+        
+        if self.combinations:
+            loads = np.hstack([loads, loads@self.combination_matrix()])
+
+        return loads
+
+    def element_load_stack(self)->np.ndarray:
+        """
+        Returns the (n_elem, 6) load vectors of 'elements', or a (n_elem, 6,
+        number of cases) array with one column per load case and combination
+        """
+        if not self.load_cases:
+            return np.array([element.fel for element in self.elements]).reshape(-1, 6)
+
+        return np.array([self.element_loads(element) for element in self.elements])
+
+    def model_load_stack(self, positions:np.ndarray = None)->np.ndarray:
+        """
+        Returns the (n_elem, 6) model load vectors, or a (n_elem, 6, number 
+        of cases) array with one column per load case and combination
+        (of every element or of the elements in 'positions')
+        """
+        positions = slice(None) if positions is None else positions
+
+        if not self.load_cases:
+            return self.model.loads[positions]
+
+        loads = np.stack([(self.model.loads if case == "default" else self.model.case_loads[case])[positions] 
+                          for case in self.load_cases], axis=-1)
+
+        if self.combinations:
+            loads = np.concatenate([loads, loads@self.combination_matrix()], axis=-1)
+
+        return loads
+
+    def model_DoF(self, prescribed:np.ndarray)->tuple[np.ndarray, np.ndarray]:
+        """
+        Maps model [node, dof, value] rows to (equation, value) arrays
+        """
+        nodes = prescribed[:, 0].astype(np.int64)
+        dofs = prescribed[:, 1].astype(np.int64)
+        return self.node_equations[nodes, dofs], prescribed[:, 2]
+
+    def default_case_weights(self)->np.ndarray:
+        """
+        Returns the factor of the 'default' load case in every load column:
+        1 in its own column and its combination factor in each combination
+        """
+        weights = np.array([case == "default" for case in self.load_cases], dtype=float)
+
+        if self.combinations:
+            weights = np.concatenate([weights, weights@self.combination_matrix()])
+
+        return weights
 
-                elif node.support_type == 'Pinned':
-                    self.set_node_DoF(node, support_constrained_equations['Pinned'])
-                
-                elif node.support_type == "Fixed":
-                    self.set_node_DoF(node, support_constrained_equations['Fixed'])
-  
     def check_for_prescribed_displacements(self):
+        """
+        Adds the prescribed displacements to 'UG'. With load cases they 
+        belong to the 'default' case, and to the combinations through its
+        combination factors
+        """
         disp_to_DoF = {'Xdisp': 0, 'Ydisp': 1, 'Rot': 2}
-        
-        for node in self.nodes_list:
-            for disp in node.nodal_displacement:
-                disp_type, value = disp
+        displacements = np.zeros(self.number_equations)
+
+        if self.model is not None:
+            dofs, values = self.model_DoF(self.model.displacements)
+            np.add.at(displacements, dofs, values)
+        else:
+            for node in self.nodes_list:
+                for disp in node.nodal_displacement:
+                    disp_type, value = disp
 
-                dof = node.DoF[disp_to_DoF[disp_type]]
-                self.UG[dof] += value
+                    dof = node.DoF[disp_to_DoF[disp_type]]
+                    displacements[dof] += value
 
-    def check_for_prescribed_springs(self):
+        if self.UG.ndim == 1:
+            self.UG += displacements
+        else:
+            self.UG += np.outer(displacements, self.default_case_weights())
+
+    def spring_equations(self)->tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the equations and values of every prescribed spring
+        """
         spring_to_DoF = {'TransX': 0, 'TransY': 1, 'Rot': 2}
 
-        for node in self.nodes_list:
-            for spring in node.springs:
-                spring_type, value = spring
+        if self.model is not None:
+            return self.model_DoF(self.model.springs)
+
+        springs = [(node.DoF[spring_to_DoF[spring_type]], value) 
+                   for node in self.nodes_list for spring_type, value in node.springs]
+        dofs, values = zip(*springs) if springs else ((), ())
+
+        return np.array(dofs, dtype=np.int64), np.array(values, dtype=float)
+
+    def check_for_prescribed_springs(self):
+        if self.matrix_free:
+            return
+
+        dofs, values = self.spring_equations()
+
+        if self.sparse:
+            self.add_triplets(dofs, dofs, values)
+        else:
+            np.add.at(self.KG, (dofs, dofs), values)
+
+    def add_triplets(self, rows, cols, values)->None:
+        """
+        Stores (row, col, value) stiffness contributions to be 
+        summed into the sparse 'KG' by 'build_sparse_stiffness'
+        """
+        self._triplets[0].append(np.asarray(rows, dtype=np.int64))
+        self._triplets[1].append(np.asarray(cols, dtype=np.int64))
+        self._triplets[2].append(np.asarray(values, dtype=float))
+
+    def sparse_blocks(self, rows:np.ndarray, cols:np.ndarray, values:np.ndarray)->tuple[sp.csr_matrix, ...]:
+        """
+        Builds the K00, K01 and K11 blocks (CSR, repeated entries summed) of
+        the (row, col, value) stiffness triplets. K10 entries are dropped,
+        since K10 = K01^T
+        """
+        n, N = self.number_free_equations, self.number_equations
+        free_rows, free_cols = rows < n, cols < n
+
+        def block(mask, row_start, col_start, shape):
+            return sp.coo_matrix((values[mask], (rows[mask] - row_start, cols[mask] - col_start)), shape=shape).tocsr()
+
+        return (block(free_rows & free_cols, 0, 0, (n, n)),
+                block(free_rows & ~free_cols, 0, n, (n, N - n)),
+                block(~free_rows & ~free_cols, n, n, (N - n, N - n)))
+
+    @staticmethod
+    def merge_blocks(pair:list[tuple[sp.csr_matrix, ...]])->tuple[sp.csr_matrix, ...]:
+        """
+        Sums two (K00, K01, K11) block tuples (a single one is returned as is)
+        """
+        return tuple(a + b for a, b in zip(*pair)) if len(pair) == 2 else pair[0]
+
+    def build_sparse_stiffness(self)->None:
+        """
+        Builds the K00, K01 and K11 blocks in CSR format from the stored
+        triplets, the parallel chunks and, out-of-core, the disk-backed
+        triplets (one chunk at a time). The pieces are summed pairwise, so
+        the blocks are never copied once per chunk and no full 'KG' is formed
+        """
+        rows, cols, values = (np.concatenate(t) if t else np.zeros(0, dtype=int) for t in self._triplets)
+        pieces = [self.sparse_blocks(rows, cols, values)]
+        self._triplets = ([], [], [])
+
+        if self._parallel_stiffness is not None:
+            pieces.append(self._parallel_stiffness)
+            self._parallel_stiffness = None
+
+        if self._triplet_buffers is not None:
+            rows, cols, values = self._triplet_buffers
+            for chunk in self.chunk_slices():
+                span = slice(36*chunk.start, 36*chunk.stop)
+                pieces.append(self.sparse_blocks(rows[span], cols[span], values[span]))
+            self._triplet_buffers = None
+
+        while len(pieces) > 1:
+            pieces = [self.merge_blocks(pieces[i:i+2]) for i in range(0, len(pieces), 2)]
+
+        self._K00, self._K01, self._K11 = pieces[0]
+        self._KG = None
+
+    def scratch_array(self, name:str, shape:tuple, dtype=float)->np.memmap:
+        """
+        Creates the zero-filled disk-backed array 'name' ('name.npy' in 'scratch')
+        """
+        os.makedirs(self.scratch, exist_ok=True)
+        return np.lib.format.open_memmap(os.path.join(self.scratch, f"{name}.npy"), mode="w+", 
+                                         dtype=dtype, shape=tuple(np.atleast_1d(shape)))
+
+    def chunk_slices(self)->list[slice]:
+        """
+        Splits the model elements in chunks whose working arrays
+        fit in 'memory_budget'
+        """
+        m = self.model.number_of_elements
+        size = max(1, int(self.memory_budget//self.element_bytes))
+        return [slice(start, min(start + size, m)) for start in range(0, m, size)]
+
+    def parallel_slices(self, m:int)->list[slice]:
+        """
+        Splits 'm' elements in chunks of 'chunk_size'
+        """
+        size = max(1, int(self.chunk_size))
+        return [slice(start, min(start + size, m)) for start in range(0, m, size)]
+
+    def parallel_map(self, function, chunks:list)->list:
+        """
+        Applies 'function' to every chunk in a pool of 'workers' threads.
+        The results keep the order of 'chunks'
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(function, chunks))
+
+    def parallel_element_stiffness(self, properties:tuple[np.ndarray, ...])->tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluates the rotation and stiffness stacks chunk by chunk in the 
+        thread pool, each chunk writing its own slice of the stacks
+        """
+        m = properties[0].size
+        R, kel = np.empty((m, 6, 6)), np.empty((m, 6, 6))
+
+        def compute(chunk):
+            _, R[chunk], kel[chunk] = global_stiffness(*(p[chunk] for p in properties))
+
+        self.parallel_map(compute, self.parallel_slices(m))
+        return R, kel
+
+    def assemble_parallel(self)->None:
+        """
+        Builds the CSR blocks (see 'sparse_blocks') of every chunk of the
+        element stiffness stack in the thread pool and sums them pairwise in
+        chunk order. The result is added by 'build_sparse_stiffness'
+        """
+        equations, stiffness = self.element_equations, self.element_stiffness
+
+        def chunk_blocks(chunk):
+            rows = np.repeat(equations[chunk], 6, axis=1).ravel()
+            cols = np.tile(equations[chunk], (1, 6)).ravel()
+            return self.sparse_blocks(rows, cols, stiffness[chunk].ravel())
+
+        matrices = self.parallel_map(chunk_blocks, self.parallel_slices(equations.shape[0]))
+        while len(matrices) > 1:
+            matrices = self.parallel_map(self.merge_blocks, [matrices[i:i+2] for i in range(0, len(matrices), 2)])
+
+        self._parallel_stiffness = matrices[0] if matrices else None
+
+    def assemble_out_of_core(self)->None:
+        """
+        Evaluates the element stiffness chunk by chunk, writing the element
+        stacks and the (row, col, value) stiffness triplets to disk-backed
+        buffers, and scatters the element loads into 'FG'. 'build_sparse_stiffness'
+        then sums the triplets into 'KG' one chunk at a time
+        """
+        m = self.model.number_of_elements
+        self.rotation_matrices = self.scratch_array("rotation_matrices", (m, 6, 6))
+        self.element_stiffness = self.scratch_array("element_stiffness", (m, 6, 6))
+
+        if not self.matrix_free:
+            self._triplet_buffers = (self.scratch_array("triplet_rows", (36*m,), np.int64),
+                                     self.scratch_array("triplet_cols", (36*m,), np.int64),
+                                     self.scratch_array("triplet_values", (36*m,)))
+
+        for chunk in self.chunk_slices():
+            _, self.rotation_matrices[chunk], self.element_stiffness[chunk] = \
+                global_stiffness(*self.model.element_properties(chunk))
+
+            equations = self.element_equations[chunk]
+            np.add.at(self.FG, equations, self.model_load_stack(chunk))
 
-                dof = node.DoF[spring_to_DoF[spring_type]]
-                self.KG[dof, dof] += value
+            if self.matrix_free:
+                continue
+
+            rows, cols, values = self._triplet_buffers
+            span = slice(36*chunk.start, 36*chunk.stop)
+            rows[span] = np.repeat(equations, 6, axis=1).ravel()
+            cols[span] = np.tile(equations, (1, 6)).ravel()
+            values[span] = self.element_stiffness[chunk].ravel()
    
-    def assemble(self, element:TStiffElement):
-        element.get_element_equations()
+    def assemble(self, element:TStiffElement, stiffness:bool = True, loads:bool = True):
+        if loads:
+            np.add.at(self.FG, element.equations, self.element_loads(element))
 
-        for i, dof_i in enumerate(element.equations):
-            self.FG[dof_i] += element.fel[i]
+        if not stiffness:
+            return
 
+        if self.sparse:
+            equations = np.asarray(element.equations)
+            self.add_triplets(np.repeat(equations, len(equations)), 
+                              np.tile(equations, len(equations)), 
+                              element.kel.ravel())
+            return
+
+        for i, dof_i in enumerate(element.equations):
             for j, dof_j in enumerate(element.equations):
                 self.KG[dof_i, dof_j] += element.kel[i, j]
 
+    def assemble_stacks(self, stiffness:bool = True)->None:
+        """
+        Scatters the element stiffness and load stacks into 'KG' and 'FG'
+        using the (n_elem, 6) element equations
+        """
+        equations = self.element_equations
+        np.add.at(self.FG, equations, self.model_load_stack())
+
+        if not stiffness:
+            return
+
+        rows = np.repeat(equations, 6, axis=1).ravel()
+        cols = np.tile(equations, (1, 6)).ravel()
+
+        if self.sparse:
+            self.add_triplets(rows, cols, self.element_stiffness.ravel())
+        else:
+            np.add.at(self.KG, (rows, cols), self.element_stiffness.ravel())
+
+    def load_stack(self, positions:slice = slice(None))->np.ndarray:
+        """
+        Returns the load vectors of the elements in 'positions', from the 
+        model or from 'elements' (same layout as model_load_stack)
+        """
+        if self.model is not None:
+            return self.model_load_stack(positions)
+
+        return self.element_load_stack()[positions]
+
+    def model_element_solution(self, positions:slice = slice(None))->tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the displacement and reaction force stacks of the elements 
+        in 'positions', (n, 6) or (n_cases, n, 6). The displacements are
+        gathered through 'element_equations' and the forces evaluated in one
+        einsum against the stiffness stack
+        """
+        uel = self.UG[self.element_equations[positions]]
+        solution = (np.einsum("eij,ej...->ei...", self.element_stiffness[positions], uel) 
+                    - self.load_stack(positions))
+
+        if self.element_geometric is not None and self.load_cases:
+            solution += np.einsum("ceij,ejc->eic", self.element_geometric[:, positions], uel)
+        elif self.element_geometric is not None:
+            solution += np.einsum("eij,ej->ei", self.element_geometric[positions], uel)
+
+        if self.load_cases:
+            return np.moveaxis(uel, -1, 0), np.moveaxis(solution, -1, 0)
+
+        return uel, solution
+
     def find_element_solution(self):
-        for e in self.elements:
-            for i, equation in enumerate(e.equations):
-                e.uel[i] += self.UG[equation]
-            
-            e.solution = np.dot(e.kel, e.uel) - e.fel
+        if self.model is not None and self.out_of_core:
+            m = self.model.number_of_elements
+            shape = (len(self.case_names), m, 6) if self.load_cases else (m, 6)
+            self.element_displacements = self.scratch_array("element_displacements", shape)
+            self.element_solutions = self.scratch_array("element_solutions", shape)
 
-    def Run(self)->None:
-        self.check_for_prescribed_displacements()
+            for chunk in self.chunk_slices():
+                (self.element_displacements[..., chunk, :], 
+                 self.element_solutions[..., chunk, :]) = self.model_element_solution(chunk)
+            return
 
-        for element in self.elements:
-            element.rotate()
-            element.calc_stiff()
+        self.element_displacements, self.element_solutions = self.model_element_solution()
+        if self.model is not None:
+            return
 
-            self.assemble(element)
+        for k, e in enumerate(self.elements):
+            if self.load_cases:
+                e.case_uel = self.element_displacements[:, k]
+                e.case_solution = self.element_solutions[:, k]
+                continue
 
-        self.check_for_prescribed_springs()
+            e.uel = self.element_displacements[k]
+            e.solution = self.element_solutions[k]
+            if self.element_geometric is not None:
+                e.kgel = self.element_geometric[k]
 
-        K00 = self.KG[:self.number_free_equations, :self.number_free_equations]
-        F0 = self.FG[:self.number_free_equations]
-        
-        u0 = np.dot(np.linalg.inv(K00), F0)
+    def local_element_solutions(self, positions:slice = slice(None))->np.ndarray:
+        """
+        Returns the reaction forces of the elements in 'positions' in their
+        local axes (R solution), (n, 6) or (n_cases, n, 6)
+        """
+        return np.einsum("eij,...ej->...ei", self.rotation_matrices[positions], 
+                         self.element_solutions[..., positions, :])
+
+    def calc_element_stiffness(self)->None:
+        """
+        Evaluates the rotation and stiffness matrices of every element in 
+        one batched kernel call. Each element 'kel' and 'rotation_matrix'
+        is a view into the (n_elem, 6, 6) stacks
+        """
+        if self.model is not None:
+            properties = self.model.element_properties()
+        else:
+            properties = element_arrays(self.elements)
+
+        if self.cache is not None:
+            self.rotation_matrices, self.element_stiffness = self.cached_stiffness(properties)
+        elif self.parallel:
+            self.rotation_matrices, self.element_stiffness = self.parallel_element_stiffness(properties)
+        else:
+            _, self.rotation_matrices, self.element_stiffness = global_stiffness(*properties)
+
+        for element, R, kel in zip(self.elements, self.rotation_matrices, self.element_stiffness):
+            element.rotation_matrix = R
+            element.kel = kel
+
+    def calc_element_mass(self, lumped:bool = False)->None:
+        """
+        Evaluates the consistent (or 'lumped') mass matrix of every element
+        in one batched kernel call. Each element 'mel' is a view into the
+        (n_elem, 6, 6) stack
+        """
+        if self.model is not None:
+            properties = self.model.mass_properties()
+        else:
+            properties = mass_arrays(self.elements)
+
+        _, _, self.element_mass = global_mass(*properties, lumped=lumped)
+
+        for element, mel in zip(self.elements, self.element_mass):
+            element.mel = mel
+
+    def assemble_matrix(self, stack:np.ndarray)->sp.csr_matrix:
+        """
+        Scatters a (n_elem, 6, 6) stack of element matrices (e.g. 'element_mass')
+        into a CSR matrix over all the equations
+        """
+        equations = self.element_equations
+        rows = np.repeat(equations, 6, axis=1).ravel()
+        cols = np.tile(equations, (1, 6)).ravel()
+        shape = (self.number_equations, self.number_equations)
+
+        return sp.coo_matrix((stack.ravel(), (rows, cols)), shape=shape).tocsr()
+
+    def cached_stiffness(self, properties:tuple[np.ndarray, ...])->tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluates the rotation and stiffness stacks once per distinct (rounded)
+        E, A, I, length and angle, taking the ones already known from 'cache'
+        """
+        parameters = np.column_stack(properties)
+        unique, first, inverse, counts = np.unique(self.cache.round_values(parameters), axis=0, return_index=True,
+                                                   return_inverse=True, return_counts=True)
+
+        def compute(missing):
+            _, R, kel = global_stiffness(*parameters[first[missing]].T)
+            return list(zip(R, kel))
+
+        keys = [("element", *row) for row in unique.tolist()]
+        values = self.cache.get_many(keys, compute, counts)
+
+        inverse = inverse.reshape(-1)
+        R = np.array([R for R, _ in values]).reshape(-1, 6, 6)
+        kel = np.array([kel for _, kel in values]).reshape(-1, 6, 6)
+        return R[inverse], kel[inverse]
+
+    def equation_nodes(self)->np.ndarray:
+        """
+        Returns the node (position in 'nodes_list' or in the model) owning
+        each equation, used to group the nodal blocks of block-Jacobi
+        """
+        if self.model is not None:
+            element_nodes = self.model.connectivity
+        else:
+            position = {node.index: i for i, node in enumerate(self.nodes_list)}
+            element_nodes = np.array([[position[node.index] for node in element.nodes] 
+                                      for element in self.elements]).reshape(-1, 2)
+
+        labels = np.zeros(self.number_equations, dtype=np.int64)
+        labels[self.element_equations[:, :3]] = element_nodes[:, :1]
+        labels[self.element_equations[:, 3:]] = element_nodes[:, 1:]
+        return labels
+
+    def free_operator(self)->TStiffOperator:
+        """
+        Returns the matrix-free K00 operator built from the element stiffness stack
+        """
+        dofs, values = self.spring_equations()
+        return TStiffOperator(self.element_stiffness, self.element_equations, self.number_free_equations, dofs, values)
+
+    def assemble_system(self)->None:
+        """
+        Scatters the element stiffness and loads into 'KG' and 'FG' and
+        adds the prescribed springs. With 'workers', the element stiffness of
+        a sparse 'KG' is assembled in parallel chunks
+        """
+        parallel = self.parallel and self.sparse and not self.matrix_free and not self.out_of_core
+        stiffness = not self.matrix_free and not parallel
+
+        if self.model is not None and not self.out_of_core:
+            self.assemble_stacks(stiffness=stiffness)
+
+        if self.elements:
+            np.add.at(self.FG, self.element_equations, self.element_load_stack())
+
+        if stiffness:
+            for element in self.elements:
+                self.assemble(element, loads=False)
+
+        if parallel:
+            with self.phase("parallel"):
+                self.assemble_parallel()
+
+        with self.phase("springs"):
+            self.check_for_prescribed_springs()
+
+        if self.sparse and not self.matrix_free:
+            with self.phase("sparse"):
+                self.build_sparse_stiffness()
+
+        if not self.matrix_free:
+            self.partition_stiffness()
+
+    def solve_system(self)->None:
+        """
+        Factorizes K00 and solves K00 u0 = F0 - K01 u1 for every load column
+        (u1: prescribed displacements)
+        """
+        K00 = self.free_operator() if self.matrix_free else self.K00
+
+        if self.solver.preconditioner == "block_jacobi" and self.solver.blocks is None:
+            self.solver.blocks = self.equation_nodes()
+
+        F0 = self.free_load()
+
+        self.solver.factorize(K00)
+        u0 = self.solver.solve(F0)
         self.UG[:self.number_free_equations] += u0
+        self.free_solution = u0
+        self.clear_update()
+
+    def partition_stiffness(self)->None:
+        """
+        Splits the assembled 'KG' into its K00, K01 and K11 blocks. Dense
+        blocks are views of 'KG'; a sparse 'KG' is replaced by its blocks
+        ('build_sparse_stiffness' already assembles the sparse blocks)
+        """
+        n = self.number_free_equations
+        KG = self._KG
+
+        if self.sparse and KG is None:
+            return
+        if self.sparse:
+            KG = sp.csr_matrix(KG)
+            self._K00, self._K01, self._K11 = KG[:n, :n], KG[:n, n:], KG[n:, n:]
+            self._KG = None
+        else:
+            self._K00, self._K01, self._K11 = KG[:n, :n], KG[:n, n:], KG[n:, n:]
+
+    def prescribed_element_forces(self, positions:slice = slice(None))->np.ndarray:
+        """
+        Returns the element forces kel u1 of the prescribed displacements alone 
+        (free displacements set to zero), (n_elem, 6) or (n_elem, 6, n_cases)
+        """
+        equations = self.element_equations[positions]
+        constrained = equations >= self.number_free_equations
+        U1 = self.UG[equations]*constrained.reshape(constrained.shape + (1,)*(self.UG.ndim - 1))
+
+        return np.einsum("eij,ej...->ei...", self.element_stiffness[positions], U1)
 
-        self.find_element_solution()
+    def prescribed_forces(self)->np.ndarray:
+        """
+        Returns K01 u1, the free equation forces of the prescribed displacements
+        u1 (the constrained part of 'UG'). Without an assembled K01 they are 
+        summed from the element stiffness
+        """
+        n = self.number_free_equations
+        U1 = np.asarray(self.UG[n:])
+
+        if not np.any(U1):
+            return np.zeros((n,) + U1.shape[1:])
+
+        if self.K01 is not None:
+            return self.K01@U1
+
+        forces = np.zeros(self.UG.shape)
+        np.add.at(forces, self.element_equations, self.prescribed_element_forces())
+        return forces[:n]
+
+    def free_load(self)->np.ndarray:
+        """
+        Returns the free right hand side F0 - K01 u1
+        """
+        return self.FG[:self.number_free_equations] - self.prescribed_forces()
+
+    def find_reactions(self)->None:
+        """
+        Evaluates the support reactions R1 = K10 u0 + K11 u1 - F1 with one
+        product per block. Matrix-free and P-Delta analyses sum the element 
+        forces instead
+        """
+        n = self.number_free_equations
+        F1 = np.asarray(self.FG[n:])
+
+        if self.K01 is not None and self.element_geometric is None:
+            self.reactions = self.K01.T@self.UG[:n] + self.K11@self.UG[n:] - F1
+            return
+
+        uel = self.UG[self.element_equations]
+        if self.element_geometric is not None and self.load_cases:
+            stiffness = self.element_stiffness[None] + self.element_geometric
+            forces = np.einsum("ceij,ejc->eic", stiffness, uel)
+        else:
+            stiffness = self.element_stiffness if self.element_geometric is None else self.element_stiffness + self.element_geometric
+            forces = np.einsum("eij,ej...->ei...", stiffness, uel)
+
+        internal = np.zeros(self.UG.shape)
+        np.add.at(internal, self.element_equations, forces)
+
+        dofs, values = self.spring_equations()
+        np.add.at(internal, dofs, values.reshape((-1,) + (1,)*(self.UG.ndim - 1))*self.UG[dofs])
+
+        self.reactions = internal[n:] - F1
+
+    def node_reactions(self)->np.ndarray:
+        """
+        Returns the support reactions [x, y, rotation] of each node (model or
+        'nodes_list' order), (n_nodes, 3) or (n_nodes, 3, n_cases). Free 
+        directions are zero
+        """
+        n = self.number_free_equations
+        R = np.zeros(self.UG.shape)
+        R[n:] = self.reactions
+
+        if self.model is not None:
+            return R[self.node_equations]
+
+        return R[np.array([node.DoF[:3] for node in self.nodes_list], dtype=np.int64).reshape(-1, 3)]
+
+    def phase(self, name:str):
+        """
+        Returns the profiler context measuring the phase 'name'
+        (a no-op context when there is no profiler)
+        """
+        return nullcontext() if self.profiler is None else self.profiler.phase(name)
+
+    def count(self)->None:
+        """
+        Sends the system sizes to the profiler
+        """
+        if self.K00 is None:
+            nonzeros = None
+        elif self.sparse:
+            nonzeros = self.K00.nnz + 2*self.K01.nnz + self.K11.nnz
+        else:
+            nonzeros = int(np.count_nonzero(self.KG))
+        self.profiler.count(elements=self.model.number_of_elements if self.model is not None else len(self.elements),
+                            nodes=self.model.number_of_nodes if self.model is not None else len(self.nodes_list),
+                            equations=self.number_equations, free_equations=self.number_free_equations,
+                            nonzeros=nonzeros, load_columns=len(self.case_names) if self.load_cases else 1,
+                            solver=self.solver.backend)
+
+    def Run(self)->None:
+        with self.phase("allocation"):
+            self.allocate_system()
+
+        with self.phase("displacements"):
+            self.check_for_prescribed_displacements()
+
+        with self.phase("stiffness"):
+            if self.out_of_core:
+                self.assemble_out_of_core()
+            else:
+                self.calc_element_stiffness()
+
+        with self.phase("assembly"):
+            self.assemble_system()
+        with self.phase("solve"):
+            self.solve_system()
+        with self.phase("recovery"):
+            self.find_element_solution()
+            self.find_reactions()
+
+        if self.profiler is not None:
+            self.count()
+
+    def element_axial_forces(self, U:np.ndarray = None)->np.ndarray:
+        """
+        Returns the axial force (tension positive) of every element for the
+        displacements 'U' (default: 'UG'), (n_elem,) or (n_elem, n_cases)
+        """
+        if self.model is not None:
+            E, A, _, L, angle = self.model.element_properties()
+        else:
+            E, A, _, L, angle = element_arrays(self.elements)
+
+        U = self.UG if U is None else U
+        return axial_forces(E, A, L, angle, U[self.element_equations])
+
+    def find_pdelta_pattern(self)->None:
+        """
+        Finds the CSR pattern of the free tangent stiffness, K00 plus every
+        element coupling, and where each element entry is stored in it. The
+        pattern is shared by every P-Delta iteration
+        """
+        n = self.number_free_equations
+        equations = self.element_equations
+        rows = np.repeat(equations, 6, axis=1).ravel()
+        cols = np.tile(equations, (1, 6)).ravel()
+        free = (rows < n) & (cols < n)
+
+        if not self.sparse:
+            self._pdelta_pattern = {"free": free, "rows": rows[free], "cols": cols[free]}
+            return
+
+        K00 = sp.coo_matrix(self.K00)
+        K00.sum_duplicates()
+        stiffness_keys = K00.row.astype(np.int64)*n + K00.col
+        element_keys = rows[free].astype(np.int64)*n + cols[free]
+        keys = np.union1d(stiffness_keys, element_keys)
+
+        base = np.zeros(keys.size)
+        base[np.searchsorted(keys, stiffness_keys)] = K00.data
+
+        self._pdelta_pattern = {"free": free, "slots": np.searchsorted(keys, element_keys), "base": base,
+                                "indices": keys % n, "indptr": np.searchsorted(keys, np.arange(n + 1)*n)}
+
+    def tangent_stiffness(self, kg:np.ndarray)->np.ndarray | sp.csr_matrix:
+        """
+        Returns the free tangent stiffness K00 + Kg00, given the (n_elem, 6, 6)
+        geometric stiffness stack 'kg', on the fixed P-Delta pattern
+        """
+        n = self.number_free_equations
+        pattern = self._pdelta_pattern
+        values = kg.ravel()[pattern["free"]]
+
+        if not self.sparse:
+            Kt = np.array(self.K00)
+            np.add.at(Kt, (pattern["rows"], pattern["cols"]), values)
+            return Kt
+
+        data = pattern["base"] + np.bincount(pattern["slots"], weights=values, minlength=pattern["base"].size)
+        return sp.csr_matrix((data, pattern["indices"], pattern["indptr"]), shape=(n, n))
+
+    def RunPDelta(self, tolerance:float = 1e-8, max_iterations:int = 50, refactor_every:int = 1)->None:
+        """
+        Second-order (P-Delta) analysis. The linear solution is corrected by
+        Newton iterations on (K + Kg(N)) u = F, where the geometric stiffness Kg
+        of each element follows its axial force N. 'refactor_every' sets how
+        often the tangent stiffness is factorized again: 1 is the full Newton
+        method, k > 1 the modified Newton method and 0 keeps the factorization
+        of the first iteration. Iterations stop when |F - Kt u| <= tolerance |F|;
+        a load column still above it after 'max_iterations' is reported with a
+        warning and keeps its last iterate. Every load column is iterated on its
+        own, and 'solver' keeps the last tangent factorization
+        """
+        if self.matrix_free or self.out_of_core:
+            print("ERROR: P-Delta analyses need an assembled in-memory stiffness matrix")
+            DebugStop()
+
+        with self.phase("pdelta"):
+            self.Run()
+
+            n = self.number_free_equations
+            if self.model is not None:
+                _, _, _, L, angle = self.model.element_properties()
+            else:
+                _, _, _, L, angle = element_arrays(self.elements)
+            self.find_pdelta_pattern()
+            F0 = self.free_load()
+
+            self.pdelta_report = []
+            geometric = []
+            for j, case in enumerate(self.case_names if self.load_cases else ["default"]):
+                U = self.UG[:, j] if self.load_cases else self.UG
+                F = F0[:, j] if self.load_cases else F0
+                u = U[:n]
+                norm = np.linalg.norm(F) or 1.0
+
+                for iteration in range(1, max_iterations + 1):
+                    start = time.perf_counter()
+                    _, _, kg = global_geometric_stiffness(self.element_axial_forces(U), L, angle)
+                    Kt = self.tangent_stiffness(kg)
+                    r = F - Kt@u
+                    residual = np.linalg.norm(r)/norm
+
+                    if residual <= tolerance:
+                        self.pdelta_report.append({"case": case, "iteration": iteration, "residual": residual, 
+                                                   "increment": 0.0, "refactorized": False, "converged": True,
+                                                   "time": time.perf_counter() - start})
+                        break
+
+                    refactorized = iteration == 1 or bool(refactor_every) and (iteration - 1) % refactor_every == 0
+                    if refactorized:
+                        self.solver.refactorize(Kt)
+
+                    du = self.solver.solve(r)
+                    u += du
+
+                    self.pdelta_report.append({"case": case, "iteration": iteration, "residual": residual,
+                                               "increment": np.linalg.norm(du)/(np.linalg.norm(u) or 1.0),
+                                               "refactorized": refactorized, "converged": False,
+                                               "time": time.perf_counter() - start})
+                else:
+                    print(f"WARNING: P-Delta case '{case}' did not converge in {max_iterations} iterations "
+                          f"(residual {residual:.3e} before the last increment)")
+                    _, _, kg = global_geometric_stiffness(self.element_axial_forces(U), L, angle)
+
+                geometric.append(kg)
+
+            self.element_geometric = np.array(geometric) if self.load_cases else geometric[0]
+            self.free_solution = self.UG[:n].copy()
+            self.find_element_solution()
+            self.find_reactions()
+
+    def pdelta_summary(self)->str:
+        """
+        Returns the P-Delta iterations as a table
+        """
+        lines = [f"{'case':<16}{'iteration':>10}{'residual':>12}{'increment':>12}{'refactor':>10}{'time [s]':>12}"]
+        for r in self.pdelta_report:
+            lines.append(f"{r['case']:<16}{r['iteration']:>10}{r['residual']:12.4e}{r['increment']:12.4e}"
+                         f"{'yes' if r['refactorized'] else 'no':>10}{r['time']:12.4e}")
+
+        return "\n".join(lines)
+
+    def element_positions(self, elements:list)->np.ndarray:
+        """
+        Returns the positions in the analysis of 'elements', given as 
+        TStiffElement objects or as positions
+        """
+        position = {element.index: i for i, element in enumerate(self.elements)}
+        return np.array([position[e.index] if isinstance(e, TStiffElement) else int(e) for e in elements], 
+                        dtype=np.int64)
+
+    def clear_update(self)->None:
+        """
+        Forgets the stiffness changes accumulated since the last factorization
+        """
+        self._update_equations = np.zeros(0, dtype=np.int64)
+        self._update_matrix = np.zeros((0, 0))
+
+    def accumulate_update(self, positions:np.ndarray, delta:np.ndarray)->None:
+        """
+        Adds the element stiffness changes 'delta' to the (s, s) free-free 
+        update matrix D, so that K00 (current) = K00 (factorized) + P D P^T
+        """
+        n = self.number_free_equations
+        equations = self.element_equations[positions]
+        rows = np.repeat(equations, 6, axis=1).ravel()
+        cols = np.tile(equations, (1, 6)).ravel()
+        free = (rows < n) & (cols < n)
+
+        touched = np.union1d(self._update_equations, equations[equations < n])
+        D = np.zeros((touched.size, touched.size))
+
+        old = np.searchsorted(touched, self._update_equations)
+        D[np.ix_(old, old)] = self._update_matrix
+        np.add.at(D, (np.searchsorted(touched, rows[free]), np.searchsorted(touched, cols[free])), 
+                  delta.ravel()[free])
+
+        self._update_equations, self._update_matrix = touched, D
+
+    def update_stiffness(self, positions:np.ndarray, delta:np.ndarray)->None:
+        """
+        Adds the element stiffness changes 'delta' to the K00, K01 and K11 blocks
+        """
+        if self.matrix_free:
+            return
+
+        equations = self.element_equations[positions]
+        rows = np.repeat(equations, 6, axis=1).ravel()
+        cols = np.tile(equations, (1, 6)).ravel()
+
+        if self.sparse:
+            n, shape = self.number_free_equations, (self.number_equations, self.number_equations)
+            D = sp.csr_matrix((delta.ravel(), (rows, cols)), shape=shape)
+            self._K00 = self.K00 + D[:n, :n]
+            self._K01 = self.K01 + D[:n, n:]
+            self._K11 = self.K11 + D[n:, n:]
+        else:
+            np.add.at(self.KG, (rows, cols), delta.ravel())
+
+    def Reanalyse(self, modified:list)->None:
+        """
+        Updates the solution after the section or material of the 'modified'
+        elements (TStiffElement objects or positions) changed. Small changes
+        are solved with a Sherman-Morrison-Woodbury update of the stored
+        factorization: u = y - Z (I + D Z_s)^-1 D y_s, with y = K^-1 F and
+        Z = K^-1 P. Larger ones refactorize the updated K00
+        """
+        with self.phase("reanalysis"):
+            start = time.perf_counter()
+            n = self.number_free_equations
+            positions = self.element_positions(modified)
+
+            if self.model is not None:
+                properties = self.model.element_properties(positions)
+            else:
+                properties = element_arrays([self.elements[p] for p in positions])
+
+            _, _, kel = global_stiffness(*properties)
+            delta = kel - self.element_stiffness[positions]
+            self.element_stiffness[positions] = kel
+
+            self.update_stiffness(positions, delta)
+            self.accumulate_update(positions, delta)
+
+            F0 = self.free_load()
+            rank = self._update_equations.size
+
+            if self.solver.backend == "pcg" or rank > self.update_limit*n:
+                method = "refactorization"
+                K00 = self.free_operator() if self.matrix_free else self.K00
+                self.solver.factorize(K00)
+                u0 = self.solver.solve(F0)
+                self.clear_update()
+            else:
+                method = "woodbury"
+                S, D = self._update_equations, self._update_matrix
+                P = np.zeros((n, rank))
+                P[S, np.arange(rank)] = 1.0
+
+                Z = self.solver.solve(P)
+                y = self.solver.solve(F0)
+                u0 = y - Z@np.linalg.solve(np.eye(rank) + D@Z[S], D@y[S])
+
+            self.UG[:n] += u0 - self.free_solution
+            self.free_solution = u0
+            self.find_element_solution()
+            self.find_reactions()
+
+            self.reanalysis_report = {"method": method, "elements": positions.size, "rank": rank, 
+                                      "time": time.perf_counter() - start}
+
+    def Export(self, directory: str)->TStiffStore:
+        """
+        Writes 'UG', 'FG', the element displacement/reaction/load stacks and the
+        DoF map as binary .npy/.npz files with a JSON manifest in 'directory'
+        (see TStiffStore). Returns the store, which reads them back lazily
+        """
+        store = TStiffStore(directory)
+        with self.phase("output"):
+            store.save(self)
+        return store
 
     def Results(self, variables: list[str], file: str = None)->None:
         """
@@ -217,6 +1577,9 @@ class TStiffAnalysis:
             - 'kel': element stiffness matrix
             - 'rot': element rotation matrix
             - 'sol': element reaction forces
+            - 'loc': element reaction forces in local axes
+
+        Analyses of a 'model' keep their results in the element stacks instead.
         """
         def print_vector(vector, notation=1):
             end = ', '
@@ -242,7 +1605,9 @@ class TStiffAnalysis:
         def print_reults(file):
             nprint(f"{'='*15} ELEMENT RESULTS {'='*15}")
 
-            for e in self.elements:
+            local_solutions = self.local_element_solutions() if 'loc' in variables else None
+
+            for e_position, e in enumerate(self.elements):
                 nprint(f"* Index: {e.index}")
                 nprint('')
 
@@ -271,13 +1636,23 @@ class TStiffAnalysis:
                     nprint('')
                     
                 if 'fel' in variables:
-                    nprint(f"* Load Vector:", e=' ')
-                    print_vector(e.fel)
+                    if self.load_cases:
+                        for case, load in zip(self.case_names, self.element_loads(e).T):
+                            nprint(f"* Load Vector [{case}]:", e=' ')
+                            print_vector(load)
+                    else:
+                        nprint(f"* Load Vector:", e=' ')
+                        print_vector(e.fel)
                     nprint('')
                 
                 if 'uel' in variables:
-                    nprint(f"* Displacement:", e=' ')
-                    print_vector(e.uel)
+                    if self.load_cases:
+                        for case, uel in zip(self.case_names, e.case_uel):
+                            nprint(f"* Displacement [{case}]:", e=' ')
+                            print_vector(uel)
+                    else:
+                        nprint(f"* Displacement:", e=' ')
+                        print_vector(e.uel)
                     nprint('')
 
                 if 'kel' in variables:
@@ -290,8 +1665,24 @@ class TStiffAnalysis:
                     print_matrix(e.rotation_matrix)
 
                 if 'sol'in variables:
-                    nprint(f"* Solution:", e=' ')
-                    print_vector(e.solution)
+                    if self.load_cases:
+                        for case, solution in zip(self.case_names, e.case_solution):
+                            nprint(f"* Solution [{case}]:", e=' ')
+                            print_vector(solution)
+                    else:
+                        nprint(f"* Solution:", e=' ')
+                        print_vector(e.solution)
+                    nprint('')
+
+                if 'loc' in variables:
+                    local = local_solutions[..., e_position, :]
+                    if self.load_cases:
+                        for case, solution in zip(self.case_names, local):
+                            nprint(f"* Local Solution [{case}]:", e=' ')
+                            print_vector(solution)
+                    else:
+                        nprint(f"* Local Solution:", e=' ')
+                        print_vector(local)
                     nprint('')
 
                 nprint(f"{'-'*21} *** {'-'*21}")
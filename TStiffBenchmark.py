@@ -0,0 +1,456 @@
+"""
+Scaling benchmark of the Stiffness Method analysis. Synthetic structures
+(portal frames, Pratt/Warren trusses, multi-storey frames and random hinged
+networks) are generated with a target number of elements and every phase
+of the analysis is timed. Results are written to JSON and can be compared
+against a stored baseline.
+
+Usage:
+    python TStiffBenchmark.py run --sizes 10 100 1000 --output bench.json
+    python TStiffBenchmark.py compare bench.json baseline.json --tolerance 0.25
+"""
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import numpy as np
+import scipy
+from dataclasses import dataclass, field
+from typing import ClassVar
+from scipy.spatial import Delaunay
+from TStiffModel import TStiffModel
+from TStiffAnalysis import TStiffAnalysis
+from TStiffKernel import uniform_load_forces
+from TStiffProfiler import TStiffProfiler
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+#%% --------------------------
+#       GENERATORS
+# ----------------------------
+sections = [[0.3*0.6, 0.3*0.6**3/12], [0.2*0.5, 0.2*0.5**3/12], [0.1*0.1, 0.1*0.1**3/12]]
+materials = [[25e6, 0.3]]
+
+def build_model(coordinates, connectivity, supports, section_ids, hinges=None, loads=None)->TStiffModel:
+    """
+    Builds a TStiffModel from generated arrays. Elements are oriented from
+    left to right (bottom to top when vertical), as TStiffElement.Angle expects.
+    'loads' maps element positions to uniform loads
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    connectivity = np.asarray(connectivity, dtype=np.int64).reshape(-1, 2)
+
+    start, end = coordinates[connectivity[:, 0]], coordinates[connectivity[:, 1]]
+    flip = (end[:, 0] < start[:, 0]) | ((end[:, 0] == start[:, 0]) & (end[:, 1] < start[:, 1]))
+    connectivity[flip] = connectivity[flip, ::-1]
+
+    model = TStiffModel(_coordinates=coordinates, _supports=supports, _connectivity=connectivity,
+                        _sections=sections, _materials=materials, _section_ids=section_ids,
+                        _material_ids=np.zeros(len(connectivity)), _hinges=hinges)
+
+    if loads is not None:
+        positions, q = loads
+        model.loads[positions] = uniform_load_forces(q, model.lengths(positions))
+
+    return model
+
+def portal_frames(n_elements:int, span:float = 12.0, height:float = 6.0, rise:float = 1.5)->TStiffModel:
+    """
+    Row of pitched portal frames sharing their columns (3 elements per bay)
+    """
+    bays = max(1, (n_elements - 1)//3)
+
+    x = span*np.arange(bays + 1)
+    bases = np.column_stack([x, np.zeros(bays + 1)])
+    eaves = np.column_stack([x, np.full(bays + 1, height)])
+    apexes = np.column_stack([x[:-1] + span/2, np.full(bays, height + rise)])
+
+    b, e, a = np.arange(bays + 1), bays + 1 + np.arange(bays + 1), 2*(bays + 1) + np.arange(bays)
+    columns = np.column_stack([b, e])
+    rafters = np.vstack([np.column_stack([e[:-1], a]), np.column_stack([a, e[1:]])])
+
+    supports = np.zeros(2*(bays + 1) + bays, dtype=np.int8)
+    supports[b] = TStiffModel.support_types.index('Fixed')
+
+    section_ids = np.r_[np.zeros(len(columns)), np.ones(len(rafters))]
+    rafter_positions = len(columns) + np.arange(len(rafters))
+
+    return build_model(np.vstack([bases, eaves, apexes]), np.vstack([columns, rafters]), supports,
+                       section_ids, loads=(rafter_positions, -5.0))
+
+def multi_storey(n_elements:int, span:float = 6.0, height:float = 3.0)->TStiffModel:
+    """
+    Rectangular multi-storey frame, storeys*(2*bays + 1) elements
+    """
+    storeys = max(1, int(np.sqrt(n_elements/2)))
+    bays = max(1, (n_elements//storeys - 1)//2)
+
+    i, j = np.meshgrid(np.arange(bays + 1), np.arange(storeys + 1))
+    node = lambda i, j: j*(bays + 1) + i
+    coordinates = np.column_stack([span*i.ravel(), height*j.ravel()])
+
+    ci, cj = np.meshgrid(np.arange(bays + 1), np.arange(storeys))
+    columns = np.column_stack([node(ci, cj).ravel(), node(ci, cj + 1).ravel()])
+    bi, bj = np.meshgrid(np.arange(bays), np.arange(1, storeys + 1))
+    beams = np.column_stack([node(bi, bj).ravel(), node(bi + 1, bj).ravel()])
+
+    supports = np.zeros(len(coordinates), dtype=np.int8)
+    supports[:bays + 1] = TStiffModel.support_types.index('Fixed')
+
+    section_ids = np.r_[np.zeros(len(columns)), np.ones(len(beams))]
+    beam_positions = len(columns) + np.arange(len(beams))
+
+    return build_model(coordinates, np.vstack([columns, beams]), supports, section_ids,
+                       loads=(beam_positions, -10.0))
+
+def truss(n_elements:int, pattern:str, panel:float = 2.0, height:float = 2.0)->TStiffModel:
+    """
+    Simply supported truss with hinged nodes. 'pattern' is 'pratt'
+    (verticals and diagonals, 4*panels + 1 elements) or 'warren'
+    (alternating diagonals, 4*panels - 1 elements)
+    """
+    if pattern == 'pratt':
+        panels = max(2, (n_elements - 1)//4)
+        bottom = np.column_stack([panel*np.arange(panels + 1), np.zeros(panels + 1)])
+        top = np.column_stack([panel*np.arange(panels + 1), np.full(panels + 1, height)])
+        p, t = np.arange(panels), panels + 1 + np.arange(panels + 1)
+
+        left = p < panels//2
+        diagonals = np.column_stack([np.where(left, t[p], p), np.where(left, p + 1, t[p + 1])])
+        members = [np.column_stack([p, p + 1]), np.column_stack([t[:-1], t[1:]]),
+                   np.column_stack([np.arange(panels + 1), t]), diagonals]
+    else:
+        panels = max(1, (n_elements + 1)//4)
+        bottom = np.column_stack([panel*np.arange(panels + 1), np.zeros(panels + 1)])
+        top = np.column_stack([panel*(np.arange(panels) + 0.5), np.full(panels, height)])
+        p, t = np.arange(panels), panels + 1 + np.arange(panels)
+
+        members = [np.column_stack([p, p + 1]), np.column_stack([t[:-1], t[1:]]),
+                   np.column_stack([p, t]), np.column_stack([t, p + 1])]
+
+    coordinates = np.vstack([bottom, top])
+    supports = np.zeros(len(coordinates), dtype=np.int8)
+    supports[0] = TStiffModel.support_types.index('Pinned')
+    supports[panels] = TStiffModel.support_types.index('RollerX')
+
+    connectivity = np.vstack(members)
+    section_ids = np.full(len(connectivity), 2)
+
+    return build_model(coordinates, connectivity, supports, section_ids,
+                       hinges=np.ones(len(coordinates), dtype=bool), loads=(np.arange(panels), -10.0))
+
+def pratt_truss(n_elements:int)->TStiffModel:
+    return truss(n_elements, 'pratt')
+
+def warren_truss(n_elements:int)->TStiffModel:
+    return truss(n_elements, 'warren')
+
+def hinged_network(n_elements:int, hinge_fraction:float = 0.3, seed:int = 0)->TStiffModel:
+    """
+    Random triangulated network (Delaunay edges of random points, about
+    3 elements per node) with randomly hinged nodes, fixed along its base
+    """
+    rng = np.random.default_rng(seed)
+    n_nodes = max(4, n_elements//3 + 2)
+    side = np.sqrt(n_nodes)
+    coordinates = rng.uniform(0, side, (n_nodes, 2))
+    coordinates[:2] = [[0, 0], [side, 0]]
+    coordinates = coordinates[np.argsort(coordinates[:, 0])]
+
+    triangles = Delaunay(coordinates).simplices
+    edges = np.sort(np.vstack([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]]), axis=1)
+    edges = np.unique(edges, axis=0)
+
+    supports = np.zeros(n_nodes, dtype=np.int8)
+    supports[coordinates[:, 1] < 0.5] = TStiffModel.support_types.index('Fixed')
+
+    loaded = np.flatnonzero(rng.random(len(edges)) < 0.2)
+
+    return build_model(coordinates, edges, supports, np.zeros(len(edges)),
+                       hinges=rng.random(n_nodes) < hinge_fraction, loads=(loaded, -1.0))
+
+generators = {"portal": portal_frames, "pratt": pratt_truss, "warren": warren_truss,
+              "multi_storey": multi_storey, "network": hinged_network}
+
+#%% --------------------------
+#       BENCHMARK
+# ----------------------------
+@dataclass
+class TStiffBenchmark:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Times every phase of TStiffAnalysis on generated structures.
+
+    Provide:
+        - 'structures': generator names (see 'generators')
+        - 'sizes': target numbers of elements
+        - 'object_limit': largest size also run with TStiffElement objects
+          (bigger ones only run on a TStiffModel)
+        - 'repeat': runs per case, the fastest time of each phase is kept
+        - 'memory': also records the peak traced memory of each phase
+          (one extra run under tracemalloc)
+        - 'options': keyword arguments of TStiffAnalysis (e.g. {'_sparse': True})
+        - 'workers': worker counts of the analysis ('_workers') run for every case.
+          With more than one, 'scaling' reports the speedup of each count
+
+    Phases are the TStiffProfiler phases of the analysis: 'nodes' (node discovery,
+    objects only), 'equations' (DoF numbering), 'allocation', 'displacements',
+    'stiffness', 'assembly' (with 'assembly/springs', 'assembly/sparse' and
+    'assembly/parallel'),
+    'solve', 'recovery' and 'output' (TStiffAnalysis.Export)
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    version: ClassVar[int] = 1
+
+    _structures: list[str] = field(default_factory=lambda: list(generators))
+    _sizes: list[int] = field(default_factory=lambda: [10, 100, 1000, 10_000, 100_000, 1_000_000])
+    _object_limit: int = 10_000
+    _repeat: int = 1
+    _memory: bool = True
+    _options: dict = field(default_factory=lambda: {"_sparse": True})
+    _workers: list[int] = field(default_factory=lambda: [0])
+    _results: list[dict] = field(init=False, default_factory=list)
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def structures(self): return self._structures
+    @structures.setter
+    def structures(self, names): self._structures = names
+
+    @property
+    def sizes(self): return self._sizes
+    @sizes.setter
+    def sizes(self, sizes): self._sizes = sizes
+
+    @property
+    def object_limit(self): return self._object_limit
+    @object_limit.setter
+    def object_limit(self, size): self._object_limit = size
+
+    @property
+    def repeat(self): return self._repeat
+    @repeat.setter
+    def repeat(self, n): self._repeat = n
+
+    @property
+    def memory(self): return self._memory
+    @memory.setter
+    def memory(self, is_traced): self._memory = is_traced
+
+    @property
+    def options(self): return self._options
+    @options.setter
+    def options(self, options): self._options = options
+
+    @property
+    def workers(self): return self._workers
+    @workers.setter
+    def workers(self, counts): self._workers = counts
+
+    @property
+    def results(self): return self._results
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def run_case(self, structure:str, size:int, objects:bool, workers:int = 0)->dict:
+        """
+        Generates one structure and times each phase of its analysis
+        (with 'workers' threads) with a TStiffProfiler
+        """
+        model = generators[structure](size)
+        times, peaks = {}, {}
+
+        for traced in [False]*self.repeat + [True]*self.memory:
+            profiler = TStiffProfiler(_memory=traced)
+            source = {"_elements": model.to_elements()} if objects else {"_model": model}
+
+            with tempfile.TemporaryDirectory() as directory:
+                analysis = TStiffAnalysis(**source, **self.options, _workers=workers, _profiler=profiler)
+                analysis.Run()
+                analysis.Export(directory)
+
+            profiler.close()
+
+            for name, total in profiler.summary().items():
+                if traced:
+                    peaks[name] = total["memory"]
+                else:
+                    times[name] = min(times.get(name, np.inf), total["wall"])
+
+        counters = next(r for r in profiler.records if r["event"] == "counters")
+        return {"structure": structure, "size": size, "mode": "objects" if objects else "model", "workers": workers,
+                **{key: value for key, value in counters.items() if key != "event"},
+                "times": times, "total": sum(t for name, t in times.items() if "/" not in name), 
+                "peak_memory": peaks}
+
+    def Run(self, output:str = None)->list[dict]:
+        """
+        Runs every structure and size (with objects up to 'object_limit')
+        and optionally writes the results to the JSON file 'output'
+        """
+        self._results = []
+
+        for structure in self.structures:
+            for size in self.sizes:
+                for objects in ([True, False] if size <= self.object_limit else [False]):
+                    for workers in self.workers:
+                        result = self.run_case(structure, size, objects, workers)
+                        self.results.append(result)
+                        print(f"{structure:>12} {result['mode']:>7} {result['elements']:>9} elements "
+                              f"{result['equations']:>9} equations {workers:>3} workers  {result['total']:.4f} s")
+
+        if len(self.workers) > 1:
+            print(self.scaling_report())
+
+        if output is not None:
+            self.write(output)
+
+        return self.results
+
+    def write(self, file:str)->None:
+        """
+        Writes the results and the environment to the JSON 'file'
+        """
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else None
+
+        report = {"version": self.version,
+                  "python": platform.python_version(), "numpy": np.__version__, "scipy": scipy.__version__,
+                  "machine": platform.machine(), "max_rss_kb": max_rss,
+                  "options": self.options, "results": self.results}
+
+        with open(file, "w") as f:
+            json.dump(report, f, indent=2)
+
+    def scaling(self, phases:tuple[str, ...] = ("stiffness", "assembly"))->list[dict]:
+        """
+        Returns, for every case, the time of 'phases' and of the whole run
+        with each worker count and its speedup over the first count of 'workers'
+        """
+        cases = {}
+        for result in self.results:
+            cases.setdefault((result["structure"], result["size"], result["mode"]), {})[result["workers"]] = result
+
+        rows = []
+        for (structure, size, mode), runs in cases.items():
+            base = runs.get(self.workers[0])
+            if base is None:
+                continue
+
+            for workers, result in runs.items():
+                times = {phase: result["times"].get(phase, 0.0) for phase in phases}
+                times["total"] = result["total"]
+                speedup = {phase: base["times"].get(phase, 0.0)/t if t > 0 else None
+                           for phase, t in times.items() if phase != "total"}
+                speedup["total"] = base["total"]/result["total"] if result["total"] > 0 else None
+                rows.append({"structure": structure, "size": size, "mode": mode, "workers": workers,
+                             "times": times, "speedup": speedup})
+
+        return rows
+
+    def scaling_report(self, phases:tuple[str, ...] = ("stiffness", "assembly"))->str:
+        """
+        Returns the 'scaling' rows as a table
+        """
+        columns = list(phases) + ["total"]
+        lines = [f"{'structure':>12}{'mode':>8}{'size':>10}{'workers':>8}" + 
+                 "".join(f"{name + ' [s]':>16}{'speedup':>9}" for name in columns)]
+
+        for row in self.scaling(phases):
+            cells = "".join(f"{row['times'][name]:16.4e}" + 
+                            (f"{row['speedup'][name]:9.2f}" if row["speedup"][name] is not None else f"{'-':>9}")
+                            for name in columns)
+            lines.append(f"{row['structure']:>12}{row['mode']:>8}{row['size']:>10}{row['workers']:>8}{cells}")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def compare(current:str, baseline:str, tolerance:float = 0.25, min_time:float = 1e-3)->list[str]:
+        """
+        Compares two JSON reports and returns the regressions: phases more than
+        'tolerance' (relative) slower, or using more than 'tolerance' more
+        peak memory, than the baseline. Phases faster than 'min_time' seconds
+        in both reports are ignored
+        """
+        with open(current) as f:
+            now = json.load(f)["results"]
+        with open(baseline) as f:
+            before = {(r["structure"], r["size"], r["mode"], r.get("workers", 0)): r for r in json.load(f)["results"]}
+
+        regressions = []
+        for result in now:
+            key = (result["structure"], result["size"], result["mode"], result.get("workers", 0))
+            if key not in before:
+                continue
+
+            for phase, t in result["times"].items():
+                t0 = before[key]["times"].get(phase)
+                if t0 is not None and max(t, t0) >= min_time and t > (1 + tolerance)*t0:
+                    regressions.append(f"{key}: {phase} time {t0:.4g} s -> {t:.4g} s")
+
+            for phase, m in result.get("peak_memory", {}).items():
+                m0 = before[key].get("peak_memory", {}).get(phase)
+                if m0 and m > (1 + tolerance)*m0:
+                    regressions.append(f"{key}: {phase} memory {m0} B -> {m} B")
+
+        return regressions
+
+#%% --------------------------
+#         MAIN FUNCTION
+# ----------------------------
+def main()->int:
+    parser = argparse.ArgumentParser(description="Stiffness Method scaling benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark and write a JSON report")
+    run.add_argument("--structures", nargs="+", default=list(generators), choices=list(generators))
+    run.add_argument("--sizes", nargs="+", type=int, default=[10, 100, 1000, 10_000])
+    run.add_argument("--object-limit", type=int, default=10_000)
+    run.add_argument("--repeat", type=int, default=1)
+    run.add_argument("--no-memory", action="store_true")
+    run.add_argument("--dense", action="store_true", help="assemble a dense 'KG'")
+    run.add_argument("--reorder", default=None, help="equation renumbering (e.g. 'rcm')")
+    run.add_argument("--workers", nargs="+", type=int, default=[0], 
+                     help="worker counts of the parallel assembly (more than one prints a scaling report)")
+    run.add_argument("--chunk-size", type=int, default=8192, help="elements per parallel chunk")
+    run.add_argument("--output", default="benchmark.json")
+
+    compare = commands.add_parser("compare", help="flag regressions against a baseline report")
+    compare.add_argument("current")
+    compare.add_argument("baseline")
+    compare.add_argument("--tolerance", type=float, default=0.25)
+    compare.add_argument("--min-time", type=float, default=1e-3)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        benchmark = TStiffBenchmark(_structures=args.structures, _sizes=args.sizes, _object_limit=args.object_limit,
+                                    _repeat=args.repeat, _memory=not args.no_memory,
+                                    _options={"_sparse": not args.dense, "_reorder": args.reorder,
+                                              "_chunk_size": args.chunk_size}, _workers=args.workers)
+        benchmark.Run(args.output)
+        return 0
+
+    regressions = TStiffBenchmark.compare(args.current, args.baseline, args.tolerance, args.min_time)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    print(f"{len(regressions)} regression(s)")
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import threading
+import numpy as np
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Hashable
+
+@dataclass
+class TStiffCache:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Bounded (least recently used) cache of element results, keyed on the
+    element or load parameters rounded to 'digits' significant digits, so
+    identical elements share one result instead of recomputing it.
+
+    Provide:
+        - 'maxsize': largest number of stored results (the least recently used is dropped)
+        - 'digits': significant digits kept in the keys
+
+    Cached arrays are made read-only, since every element with the same
+    parameters holds the same array. Lookups and stores are locked, so one
+    cache can be shared by analyses running in several threads.
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _maxsize: int = 4096
+    _digits: int = 12
+    _hits: int = field(init=False, default=0)
+    _misses: int = field(init=False, default=0)
+    _entries: OrderedDict = field(init=False, repr=False, default_factory=OrderedDict)
+    _lock: threading.RLock = field(init=False, repr=False, compare=False, default_factory=threading.RLock)
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def maxsize(self): return self._maxsize
+    @maxsize.setter
+    def maxsize(self, size): self._maxsize = size
+
+    @property
+    def digits(self): return self._digits
+    @digits.setter
+    def digits(self, digits): self._digits = digits
+
+    @property
+    def hits(self): return self._hits
+
+    @property
+    def misses(self): return self._misses
+
+    def __len__(self): return len(self._entries)
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def round_values(self, values)->np.ndarray:
+        """
+        Rounds 'values' to 'digits' significant digits
+        """
+        values = np.asarray(values, dtype=float)
+        magnitude = np.floor(np.log10(np.abs(values), out=np.zeros_like(values), where=values != 0))
+        scale = 10.0**(self.digits - 1 - magnitude)
+        return np.round(values*scale)/scale
+
+    def key(self, name:str, *values)->tuple:
+        """
+        Returns the cache key of the result 'name' for the parameters 'values'
+        """
+        return (name, *self.round_values(values).tolist())
+
+    def lookup(self, key:Hashable):
+        """
+        Returns the stored result of 'key' (None when not stored)
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def store(self, key:Hashable, value):
+        """
+        Stores 'value' (made read-only) under 'key', dropping the least
+        recently used result when the cache is full
+        """
+        for array in (value if isinstance(value, tuple) else (value,)):
+            array.flags.writeable = False
+
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def get(self, key:Hashable, compute:Callable[[], object]):
+        """
+        Returns the result of 'key', calling 'compute' only when it is not stored
+        """
+        value = self.lookup(key)
+        with self._lock:
+            if value is not None:
+                self._hits += 1
+                return value
+            self._misses += 1
+
+        return self.store(key, compute())
+
+    def get_many(self, keys:list[Hashable], compute:Callable[[list[int]], list],
+                 repeats:np.ndarray = None)->list:
+        """
+        Returns the results of 'keys'. 'compute' evaluates the missing ones
+        at once, given their positions in 'keys'. 'repeats' is the number of
+        elements sharing each key (every element after the first is a hit)
+        """
+        repeats = np.ones(len(keys), dtype=np.int64) if repeats is None else np.asarray(repeats)
+        values = [self.lookup(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+
+        for i, value in zip(missing, compute(missing) if missing else []):
+            values[i] = self.store(keys[i], value)
+
+        with self._lock:
+            self._misses += len(missing)
+            self._hits += int(repeats.sum()) - len(missing)
+        return values
+
+    def info(self)->dict[str, float]:
+        """
+        Returns the hit/miss statistics
+        """
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self), "maxsize": self.maxsize,
+                "hit_rate": self.hits/lookups if lookups else 0.0}
+
+    def clear(self)->None:
+        """
+        Drops every stored result and resets the statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = 0
@@ -0,0 +1,420 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import os
+import json
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Callable
+from numpy.lib.format import open_memmap
+from tpanic import DebugStop
+from TStiffModel import TStiffModel
+from TStiffAnalysis import TStiffAnalysis
+from TStiffSolver import TStiffSolver
+
+@dataclass
+class TStiffDynamic:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Linear time-history analysis, M a + C v + K u = F(t), integrated with
+    the Newmark-beta or HHT-alpha method. The time step is constant, so the
+    effective stiffness is factorized once and every step only costs one
+    solve and two sparse products.
+
+    Provide:
+        - 'model': structure (TStiffModel, or a list of TStiffElement). Material
+          densities give the mass
+        - 'dt': time step
+        - 'steps': number of time steps
+        - 'loads': (steps+1,) factors of the load vector of 'case', or
+          (steps+1, n_free) free equation forces
+        - 'case': load case scaled by 'loads' (default: the first load column)
+        - 'ground': (steps+1,) ground acceleration along 'direction' (0: x, 1: y).
+          Displacements are then relative to the ground
+        - 'method': 'newmark' or 'hht'
+        - 'alpha': HHT parameter, in [-1/3, 0] (0 is the average acceleration method)
+        - 'beta', 'gamma': Newmark parameters (default: 1/4, 1/2, or the HHT values
+          (1-alpha)^2/4, 1/2-alpha)
+        - 'damping': Rayleigh coefficients (a0, a1), C = a0 M + a1 K (see 'rayleigh')
+        - 'lumped': lumped instead of consistent mass matrices
+        - 'solver': TStiffSolver of the effective stiffness
+        - 'initial': initial (displacement, velocity) of the free equations
+        - 'record': equations whose histories are kept (default: every free equation)
+        - 'stride': keeps one step out of 'stride'
+        - 'output': directory where the histories are streamed as .npy files
+          (None: kept in memory)
+        - 'block': recorded steps buffered before each write to 'output'
+
+    Histories ('times', 'displacements', 'velocities', 'accelerations') have
+    one row per recorded step and one column per 'record' equation.
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _model: TStiffModel
+    _dt: float
+    _steps: int
+    _loads: np.ndarray = None
+    _case: str = None
+    _ground: np.ndarray = None
+    _direction: int = 0
+    _method: str = "newmark"
+    _alpha: float = 0.0
+    _beta: float = None
+    _gamma: float = None
+    _damping: tuple[float, float] = (0.0, 0.0)
+    _lumped: bool = False
+    _solver: TStiffSolver = field(default_factory=TStiffSolver)
+    _initial: tuple[np.ndarray, np.ndarray] = None
+    _record: np.ndarray = None
+    _stride: int = 1
+    _output: str = None
+    _block: int = 1024
+    _analysis: TStiffAnalysis = field(init=False, repr=False)
+    _K: object = field(init=False, repr=False, default=None)
+    _M: object = field(init=False, repr=False, default=None)
+    _influence: np.ndarray = field(init=False, repr=False, default=None)
+    _histories: dict[str, np.ndarray] = field(init=False, repr=False, default_factory=dict)
+    _state: tuple[np.ndarray, ...] = field(init=False, repr=False, default=None)
+    _report: dict = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        if not isinstance(self._model, TStiffModel):
+            self._model = TStiffModel.from_elements(self._model)
+
+        if self.method not in ("newmark", "hht"):
+            print(f"ERROR: time integration method not available ({self.method})")
+            DebugStop()
+
+        if self.method == "hht" and not -1/3 <= self.alpha <= 0:
+            print(f"ERROR: HHT alpha must be in [-1/3, 0] ({self.alpha})")
+            DebugStop()
+
+        self._analysis = TStiffAnalysis(_model=self._model, _sparse=True)
+        self.assemble()
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def model(self): return self._model
+    @model.setter
+    def model(self, model): self._model = model
+
+    @property
+    def dt(self): return self._dt
+    @dt.setter
+    def dt(self, dt): self._dt = dt
+
+    @property
+    def steps(self): return self._steps
+    @steps.setter
+    def steps(self, n): self._steps = n
+
+    @property
+    def loads(self): return self._loads
+    @loads.setter
+    def loads(self, loads): self._loads = loads
+
+    @property
+    def case(self): return self._case
+    @case.setter
+    def case(self, name): self._case = name
+
+    @property
+    def ground(self): return self._ground
+    @ground.setter
+    def ground(self, acceleration): self._ground = acceleration
+
+    @property
+    def direction(self): return self._direction
+    @direction.setter
+    def direction(self, dof): self._direction = dof
+
+    @property
+    def method(self): return self._method
+    @method.setter
+    def method(self, method): self._method = method
+
+    @property
+    def alpha(self): return self._alpha
+    @alpha.setter
+    def alpha(self, alpha): self._alpha = alpha
+
+    @property
+    def beta(self):
+        if self._beta is not None: return self._beta
+        return (1 - self.alpha)**2/4 if self.method == "hht" else 0.25
+    @beta.setter
+    def beta(self, beta): self._beta = beta
+
+    @property
+    def gamma(self):
+        if self._gamma is not None: return self._gamma
+        return 0.5 - self.alpha if self.method == "hht" else 0.5
+    @gamma.setter
+    def gamma(self, gamma): self._gamma = gamma
+
+    @property
+    def damping(self): return self._damping
+    @damping.setter
+    def damping(self, coefficients): self._damping = coefficients
+
+    @property
+    def lumped(self): return self._lumped
+    @lumped.setter
+    def lumped(self, is_lumped): self._lumped = is_lumped
+
+    @property
+    def solver(self): return self._solver
+    @solver.setter
+    def solver(self, solver): self._solver = solver
+
+    @property
+    def initial(self): return self._initial
+    @initial.setter
+    def initial(self, state): self._initial = state
+
+    @property
+    def record(self):
+        if self._record is None: return np.arange(self.analysis.number_free_equations)
+        return np.asarray(self._record, dtype=np.int64)
+    @record.setter
+    def record(self, equations): self._record = equations
+
+    @property
+    def stride(self): return self._stride
+    @stride.setter
+    def stride(self, n): self._stride = n
+
+    @property
+    def output(self): return self._output
+    @output.setter
+    def output(self, directory): self._output = directory
+
+    @property
+    def block(self): return self._block
+    @block.setter
+    def block(self, n): self._block = n
+
+    @property
+    def analysis(self): return self._analysis
+
+    @property
+    def K(self): return self._K
+
+    @property
+    def M(self): return self._M
+
+    @property
+    def times(self): return self._histories.get("times")
+
+    @property
+    def displacements(self): return self._histories.get("displacements")
+
+    @property
+    def velocities(self): return self._histories.get("velocities")
+
+    @property
+    def accelerations(self): return self._histories.get("accelerations")
+
+    @property
+    def state(self): return self._state
+
+    @property
+    def report(self): return self._report
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    @staticmethod
+    def rayleigh(zeta:float, omega_1:float, omega_2:float)->tuple[float, float]:
+        """
+        Returns the Rayleigh coefficients (a0, a1) giving the damping ratio
+        'zeta' at the circular frequencies 'omega_1' and 'omega_2'
+        """
+        return 2*zeta*omega_1*omega_2/(omega_1 + omega_2), 2*zeta/(omega_1 + omega_2)
+
+    def assemble(self)->None:
+        """
+        Assembles the free stiffness (with springs), mass and load vectors
+        """
+        analysis = self.analysis
+        n = analysis.number_free_equations
+
+        analysis.calc_element_stiffness()
+        analysis.assemble_system()
+        analysis.calc_element_mass(self.lumped)
+        MG = analysis.assemble_matrix(analysis.element_mass)
+
+        self._K = analysis.K00
+        self._M = MG[:n, :n]
+
+        if self.ground is not None:
+            influence = np.zeros(analysis.number_equations)
+            influence[analysis.node_equations[:, self.direction]] = 1.0
+            self._influence = MG[:n]@influence
+
+    def pattern(self)->np.ndarray:
+        """
+        Returns the free load vector scaled by (steps+1,) 'loads'
+        """
+        analysis = self.analysis
+        FG = analysis.FG[:analysis.number_free_equations]
+
+        if FG.ndim == 1:
+            return FG
+
+        column = 0 if self.case is None else analysis.case_names.index(self.case)
+        return FG[:, column]
+
+    def forces(self)->Callable[[int], np.ndarray]:
+        """
+        Returns the function giving the free equation forces of a step
+        """
+        n = self.analysis.number_free_equations
+        loads = None if self.loads is None else np.asarray(self.loads, dtype=float)
+        ground = None if self.ground is None else np.asarray(self.ground, dtype=float)
+
+        for history in (loads, ground):
+            if history is not None and history.shape[0] != self.steps + 1:
+                print(f"ERROR: histories need steps+1 = {self.steps + 1} rows ({history.shape[0]})")
+                DebugStop()
+
+        pattern = self.pattern() if loads is not None and loads.ndim == 1 else None
+
+        def force(step):
+            F = np.zeros(n)
+            if pattern is not None:
+                F += loads[step]*pattern
+            elif loads is not None:
+                F += loads[step]
+            if ground is not None:
+                F -= ground[step]*self._influence
+            return F
+
+        return force
+
+    def allocate_histories(self)->None:
+        """
+        Allocates the recorded histories, as .npy files in 'output' or in memory
+        """
+        shape = (self.steps//self.stride + 1, self.record.size)
+
+        if self.output is not None:
+            os.makedirs(self.output, exist_ok=True)
+            allocate = lambda name, shape: open_memmap(os.path.join(self.output, f"{name}.npy"), mode="w+",
+                                                       dtype=float, shape=shape)
+        else:
+            allocate = lambda name, shape: np.empty(shape)
+
+        self._histories = {"times": allocate("times", shape[:1])}
+        for name in ("displacements", "velocities", "accelerations"):
+            self._histories[name] = allocate(name, shape)
+
+    def write_block(self, start:int, buffer:dict[str, list])->None:
+        """
+        Writes the buffered records from row 'start' on and empties the buffer
+        """
+        if not buffer["times"]:
+            return
+
+        stop = start + len(buffer["times"])
+        for name, rows in buffer.items():
+            self._histories[name][start:stop] = np.array(rows)
+            rows.clear()
+
+        if self.output is not None:
+            for history in self._histories.values():
+                history.flush()
+
+    def write_manifest(self)->None:
+        """
+        Writes the integration parameters and recorded equations to 'output'
+        """
+        manifest = {"method": self.method, "dt": self.dt, "steps": self.steps, "stride": self.stride,
+                    "alpha": self.alpha, "beta": self.beta, "gamma": self.gamma, "damping": list(self.damping),
+                    "lumped": self.lumped, "record": self.record.tolist(),
+                    "histories": {name: f"{name}.npy" for name in self._histories}}
+
+        with open(os.path.join(self.output, "history.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def initial_state(self, F:np.ndarray)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the initial displacement, velocity and the acceleration
+        balancing them, M a = F - C v - K u
+        """
+        n = self.analysis.number_free_equations
+        u, v = (np.zeros(n), np.zeros(n)) if self.initial is None else (np.array(x, dtype=float) for x in self.initial)
+
+        a0, a1 = self.damping
+        r = F - self.K@(u + a1*v) - a0*(self.M@v)
+        if not np.any(r):
+            return u, v, np.zeros(n)
+
+        if np.any(self.M.diagonal() <= 0):
+            print("ERROR: the mass matrix has free equations without mass (check the material densities)")
+            DebugStop()
+
+        mass_solver = TStiffSolver()
+        mass_solver.factorize(self.M)
+        return u, v, mass_solver.solve(r)
+
+    def Run(self)->None:
+        """
+        Integrates the equations of motion over 'steps' time steps, reusing
+        one factorization of the effective stiffness
+        """
+        start = time.perf_counter()
+        K, M = self.K, self.M
+        dt, alpha, beta, gamma = self.dt, self.alpha if self.method == "hht" else 0.0, self.beta, self.gamma
+        a0, a1 = self.damping
+
+        c0, c1, c2 = 1/(beta*dt**2), gamma/(beta*dt), 1/(beta*dt)
+        c3, c4, c5 = 1/(2*beta) - 1, 1 - gamma/beta, dt*(1 - gamma/(2*beta))
+
+        self.solver.factorize((c0 + (1 + alpha)*c1*a0)*M + (1 + alpha)*(1 + c1*a1)*K)
+        factorization = time.perf_counter() - start
+
+        force = self.forces()
+        F = force(0)
+        u, v, a = self.initial_state(F)
+
+        record = self.record
+        self.allocate_histories()
+        buffer = {name: [] for name in self._histories}
+        written = 0
+
+        def keep(step):
+            buffer["times"].append(step*dt)
+            buffer["displacements"].append(u[record])
+            buffer["velocities"].append(v[record])
+            buffer["accelerations"].append(a[record])
+
+        keep(0)
+        for step in range(1, self.steps + 1):
+            F_next = force(step)
+            w = (1 + alpha)*(c4*v + c5*a) - alpha*v
+            rhs = (1 + alpha)*F_next - alpha*F - K@(u + a1*w) + M@(c2*v + c3*a - a0*w)
+
+            du = self.solver.solve(rhs)
+            u, v, a = u + du, c1*du + c4*v + c5*a, c0*du - c2*v - c3*a
+            F = F_next
+
+            if step % self.stride == 0:
+                keep(step)
+                if len(buffer["times"]) >= self.block:
+                    self.write_block(written, buffer)
+                    written += self.block
+
+        self.write_block(written, buffer)
+        if self.output is not None:
+            self.write_manifest()
+
+        self._state = (u, v, a)
+        self._report = {"method": self.method, "backend": self.solver.backend, "steps": self.steps,
+                        "factorization_time": factorization, "time": time.perf_counter() - start}
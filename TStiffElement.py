@@ -9,6 +9,7 @@ from TStiffNode import TStiffNode
 from TStiffMech import TStiffMech
 from TStiffGeo import TStiffGeo
 from TStiffLoad import TStiffLoad
+from TStiffCache import TStiffCache
 
 @dataclass
 class TStiffElement:
@@ -30,12 +31,23 @@ class TStiffElement:
         - 'fel': element load vector
         - 'uel': element displacement vector
         - 'kel': element stiffness matrix
+        - 'mel': element mass matrix ('calc_mass', consistent or lumped)
+        - 'kgel': element geometric stiffness matrix ('calc_geometric_stiff', P-Delta analyses)
         - 'rotation_matrix': element roational matrix
+        - 'case_loads': load vector of each named load case
+        - 'case_uel': displacements of each load case/combination (one row per case)
+        - 'case_solution': reaction forces of each load case/combination (one row per case)
+
+    'cache' (shared by every element, None to disable) stores the rotation and
+    stiffness/mass matrices of 'rotate', 'calc_stiff' and 'calc_mass', see TStiffCache
+
+    The element index is allocated by the TStiffRegistry of its nodes ('registry'),
+    which also stores the node connections
     """
 #%% --------------------------
 #         INITIALIZER
 # ----------------------------
-    counter: ClassVar[int] = 0
+    cache: ClassVar[TStiffCache] = TStiffCache()
 
     _nodes: list[TStiffNode]
     _mechanical_prop: TStiffMech
@@ -47,10 +59,19 @@ class TStiffElement:
     _fel: np.ndarray = field(init=False)
     _uel: np.ndarray = field(init=False)
     _kel: np.ndarray = field(init=False)
+    _mel: np.ndarray = field(init=False, default=None)
+    _kgel: np.ndarray = field(init=False, default=None)
     _rotation_matrix: np.ndarray = field(init=False)
     _solution: np.ndarray = field(init=False)
+    _case_loads: dict[str, np.ndarray] = field(init=False, default_factory=dict)
+    _case_uel: np.ndarray = field(init=False, default=None)
+    _case_solution: np.ndarray = field(init=False, default=None)
 
     def __post_init__(self):
+        if self.nodes[0].registry is not self.nodes[1].registry:
+            print("ERROR: element nodes belong to different registries")
+            DebugStop()
+
         self.length = self.Distance()
         self.angle = self.Angle()
         self.element_index()
@@ -105,6 +126,16 @@ class TStiffElement:
     @kel.setter
     def kel(self, stiff_mat): self._kel = stiff_mat
     
+    @property
+    def mel(self): return self._mel
+    @mel.setter
+    def mel(self, mass_mat): self._mel = mass_mat
+
+    @property
+    def kgel(self): return self._kgel
+    @kgel.setter
+    def kgel(self, geometric_mat): self._kgel = geometric_mat
+
     @property
     def rotation_matrix(self): return self._rotation_matrix
     @rotation_matrix.setter
@@ -115,6 +146,9 @@ class TStiffElement:
     @index.setter
     def index(self, i): self._index = i
 
+    @property
+    def registry(self): return self.nodes[0].registry
+
     @property
     def solution(self): return self._solution
     @solution.setter
@@ -125,21 +159,30 @@ class TStiffElement:
     @equations.setter
     def equations(self, eq): self._equations = eq
 
+    @property
+    def case_loads(self): return self._case_loads
+    @case_loads.setter
+    def case_loads(self, loads): self._case_loads = loads
+
+    @property
+    def case_uel(self): return self._case_uel
+    @case_uel.setter
+    def case_uel(self, displacement): self._case_uel = displacement
+
+    @property
+    def case_solution(self): return self._case_solution
+    @case_solution.setter
+    def case_solution(self, sol): self._case_solution = sol
+
 #%% --------------------------
 #        CLASS METHODS
 # ----------------------------
-    @classmethod
-    def increment_counter(cls):
-        cls.counter += 1
-        
     def element_index(self):
-        self.index = self.counter
-        TStiffElement.increment_counter()
+        self.index = self.registry.new_element()
 
     def node_connects(self):
         for node in self.nodes:
-            node.connects.append((node.number_of_connections, self.index))
-            node.number_of_connections += 1
+            self.registry.connect(node.index, self.index)
 
     def Distance(self)->float:
         """
@@ -173,40 +216,63 @@ class TStiffElement:
                 return False
         return True 
 
-    def Apply_loads(self, load_vector:list[TStiffLoad])->None:
+    def Apply_loads(self, load_vector:list[TStiffLoad], case:str = None)->None:
         """ 
-        Modify the element load vector, applying loads
+        Modify the element load vector, applying loads. Loads given 
+        a 'case' name are stored in that load case instead of 'fel'
+        (which is the 'default' load case)
         """
-        for load in load_vector:
-            if not self.check_values(load):
-                print("ERROR: Load term inconsistent")
-                DebugStop()
-                
-            self.fel += load.reaction_forces
+        if case is None or case == "default":
+            target = self.fel
+        else:
+            target = self.case_loads.setdefault(case, np.zeros(6))
+
+        if not all([self.check_values(load) for load in load_vector]):
+            print("ERROR: Load term inconsistent")
+            DebugStop()
+
+        if load_vector:
+            target += np.sum([load.reaction_forces for load in load_vector], axis=0)
 
     def get_element_equations(self)->list[int]:
+        """
+        Returns the element equations from the current node DoFs (a hinged
+        node gives the rotation of this element's connection)
+        """
+        equations = []
         for node in self.nodes:
             if not node.hinge:
-                self.equations += (node.DoF)
+                equations += node.DoF[:3]
             
             elif node.hinge:
                 for connect in node.connects:
                     i, element_i = connect
 
                     if self.index == element_i:
-                        self.equations += (node.DoF[:2])
-                        self.equations.append(node.DoF[i+2])
+                        equations += node.DoF[:2]
+                        equations.append(node.DoF[i+2])
                         break
 
+        return equations
+
     def rotate(self):
         """
-        Evaluates the element rotational matrix 
+        Evaluates the element rotational matrix (shared through 'cache'
+        by the elements with the same angle)
         """
+        if self.cache is not None:
+            self.rotation_matrix = self.cache.get(self.cache.key("rotation", self.angle), self.rotation)
+        else:
+            self.rotation_matrix = self.rotation()
 
+    def rotation(self)->np.ndarray:
+        """
+        Returns the element rotational matrix 
+        """
         lx = np.cos(self.angle)
         ly = np.sin(self.angle)
 
-        self.rotation_matrix = np.array([
+        return np.array([
             [lx, ly, 0, 0, 0, 0], 
             [-ly, lx, 0, 0, 0, 0],
             [0, 0, 1, 0, 0, 0],
@@ -217,7 +283,20 @@ class TStiffElement:
 
     def calc_stiff(self):
         """
-        Evaluates the element stiffness matrix
+        Evaluates the element stiffness matrix (shared through 'cache' by
+        the elements with the same E, A, I, length and angle)
+        """
+        if self.cache is None:
+            self.kel = self.stiffness()
+            return
+
+        key = self.cache.key("stiffness", self.mechanical_prop.E, self.geometric_prop.area, 
+                             self.geometric_prop.inertia, self.length, self.angle)
+        self.kel = self.cache.get(key, self.stiffness)
+
+    def stiffness(self)->np.ndarray:
+        """
+        Returns the element global stiffness matrix
         """
         EA = self.mechanical_prop.E*self.geometric_prop.area
         EI = self.mechanical_prop.E*self.geometric_prop.inertia
@@ -242,5 +321,90 @@ class TStiffElement:
         ])
 
         kloc = truss_stiffness + beam_stiffness
+        R = self.rotation()
+
+        return np.transpose(R)@kloc@R
+
+    def axial_force(self)->float:
+        """
+        Returns the element axial force (tension positive) given by 'uel'
+        """
+        local = self.rotation()@self.uel
+        return self.mechanical_prop.E*self.geometric_prop.area/self.length*(local[3] - local[0])
+
+    def calc_geometric_stiff(self, N:float = None):
+        """
+        Evaluates the element geometric stiffness matrix under the axial 
+        force 'N' (default: 'axial_force')
+        """
+        self.kgel = self.geometric_stiffness(self.axial_force() if N is None else N)
+
+    def geometric_stiffness(self, N:float)->np.ndarray:
+        """
+        Returns the element global geometric stiffness matrix under the axial
+        force 'N' (tension positive), which adds the second-order (P-Delta)
+        effect of 'N' to the beam stiffness
+        """
+        l = self.length
+
+        kgloc = N/(30*l)*np.array([
+            [0, 0, 0, 0, 0, 0],
+            [0, 36, 3*l, 0, -36, 3*l],
+            [0, 3*l, 4*l**2, 0, -3*l, -l**2],
+            [0, 0, 0, 0, 0, 0],
+            [0, -36, -3*l, 0, 36, -3*l],
+            [0, 3*l, -l**2, 0, -3*l, 4*l**2]
+        ])
+
+        R = self.rotation()
+
+        return np.transpose(R)@kgloc@R
+
+    def calc_mass(self, lumped:bool = False):
+        """
+        Evaluates the element mass matrix, consistent or 'lumped' (shared 
+        through 'cache' by the elements with the same density, A, length and angle)
+        """
+        if self.cache is None:
+            self.mel = self.mass(lumped)
+            return
+
+        key = self.cache.key("mass", self.mechanical_prop.density, self.geometric_prop.area, 
+                             self.length, self.angle, lumped)
+        self.mel = self.cache.get(key, lambda: self.mass(lumped))
+
+    def mass(self, lumped:bool = False)->np.ndarray:
+        """
+        Returns the element global mass matrix. The consistent matrix uses the
+        stiffness shape functions; the lumped one is diagonal, with half the
+        mass on each node translation and m l^2/24 on each rotation
+        """
+        m = self.mechanical_prop.density*self.geometric_prop.area*self.length
+        l = self.length
+
+        if lumped:
+            mloc = np.diag([m/2, m/2, m*l**2/24, m/2, m/2, m*l**2/24])
+        else:
+            truss_mass = m/6*np.array([
+                [2, 0, 0, 1, 0, 0],
+                [0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 0, 0, 0],
+                [1, 0, 0, 2, 0, 0],
+                [0, 0, 0, 0, 0, 0],
+                [0, 0, 0, 0, 0, 0]
+            ])
+
+            beam_mass = m/420*np.array([
+                [0, 0, 0, 0, 0, 0],
+                [0, 156, 22*l, 0, 54, -13*l],
+                [0, 22*l, 4*l**2, 0, 13*l, -3*l**2],
+                [0, 0, 0, 0, 0, 0],
+                [0, 54, 13*l, 0, 156, -22*l],
+                [0, -13*l, -3*l**2, 0, -22*l, 4*l**2]
+            ])
+
+            mloc = truss_mass + beam_mass
+
+        R = self.rotation()
 
-        self.kel = np.transpose(self.rotation_matrix)@kloc@self.rotation_matrix
\ No newline at end of file
+        return np.transpose(R)@mloc@R
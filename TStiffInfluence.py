@@ -0,0 +1,264 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from tpanic import DebugStop
+from TStiffModel import TStiffModel
+from TStiffAnalysis import TStiffAnalysis
+from TStiffSolver import TStiffSolver
+from TStiffElement import TStiffElement
+from TStiffKernel import nodal_force_forces
+
+@dataclass
+class TStiffInfluence:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Influence lines and moving loads. A 'nodal force' (TStiffLoad) is moved
+    along a path of elements; the fixed-end forces of every position are
+    evaluated at once and become the columns of one load matrix, solved
+    against a single factorization of K00.
+
+    Provide:
+        - 'model': structure (TStiffModel, or a list of TStiffElement)
+        - 'path': elements crossed by the load, in order, as TStiffElement or
+          positions (default: every element). Each element is crossed from its
+          first node to its second one
+        - 'step': largest distance between two load positions
+        - 'force': magnitude of the moving force (same sign convention as TStiffLoad)
+        - 'dofs': equations whose displacements are kept (default: every equation)
+        - 'elements': elements (TStiffElement or positions) whose end forces are kept
+        - 'solver': TStiffSolver of K00
+        - 'batch': load positions solved at once
+
+    Results, one row per load position ('stations', distance along the path):
+        - 'displacements': (n_positions, n_dofs)
+        - 'element_forces': (n_positions, n_elements, 6) element reaction forces,
+          same layout as the element 'solution'
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _model: TStiffModel
+    _path: list = None
+    _step: float = 0.1
+    _force: float = 1.0
+    _dofs: np.ndarray = None
+    _elements: list = field(default_factory=list)
+    _solver: TStiffSolver = field(default_factory=TStiffSolver)
+    _batch: int = 1024
+    _analysis: TStiffAnalysis = field(init=False, repr=False)
+    _stations: np.ndarray = field(init=False, default=None)
+    _loaded: np.ndarray = field(init=False, repr=False, default=None)
+    _a: np.ndarray = field(init=False, repr=False, default=None)
+    _b: np.ndarray = field(init=False, repr=False, default=None)
+    _displacements: np.ndarray = field(init=False, repr=False, default=None)
+    _element_forces: np.ndarray = field(init=False, repr=False, default=None)
+    _report: dict = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        if not isinstance(self._model, TStiffModel):
+            self._model = TStiffModel.from_elements(self._model)
+
+        position = {index: i for i, index in enumerate(self._model.element_index.tolist())}
+        as_positions = lambda elements: np.array([position[e.index] if isinstance(e, TStiffElement) else int(e)
+                                                  for e in elements], dtype=np.int64)
+
+        self._path = np.arange(self._model.number_of_elements) if self._path is None else as_positions(self._path)
+        self._elements = as_positions(self._elements)
+
+        self._analysis = TStiffAnalysis(_model=self._model, _sparse=True)
+        self.find_positions()
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def model(self): return self._model
+    @model.setter
+    def model(self, model): self._model = model
+
+    @property
+    def path(self): return self._path
+    @path.setter
+    def path(self, positions): self._path = positions
+
+    @property
+    def step(self): return self._step
+    @step.setter
+    def step(self, step): self._step = step
+
+    @property
+    def force(self): return self._force
+    @force.setter
+    def force(self, P): self._force = P
+
+    @property
+    def dofs(self):
+        if self._dofs is None: return np.arange(self.analysis.number_equations)
+        return np.asarray(self._dofs, dtype=np.int64)
+    @dofs.setter
+    def dofs(self, equations): self._dofs = equations
+
+    @property
+    def elements(self): return self._elements
+    @elements.setter
+    def elements(self, positions): self._elements = positions
+
+    @property
+    def solver(self): return self._solver
+    @solver.setter
+    def solver(self, solver): self._solver = solver
+
+    @property
+    def batch(self): return self._batch
+    @batch.setter
+    def batch(self, n): self._batch = n
+
+    @property
+    def analysis(self): return self._analysis
+
+    @property
+    def stations(self): return self._stations
+
+    @property
+    def length(self): return float(self.model.lengths(self.path).sum())
+
+    @property
+    def displacements(self): return self._displacements
+
+    @property
+    def element_forces(self): return self._element_forces
+
+    @property
+    def report(self): return self._report
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def find_positions(self)->None:
+        """
+        Places the load positions along the path: every element is split in
+        equal parts no longer than 'step', from its first node, and the path
+        ends with the load on the last node
+        """
+        if self.step <= 0:
+            print(f"ERROR: moving load step must be positive ({self.step})")
+            DebugStop()
+
+        L = self.model.lengths(self.path)
+        parts = np.maximum(1, np.ceil(L/self.step - 1e-9)).astype(np.int64)
+        start = np.concatenate([[0.0], np.cumsum(L)[:-1]])
+
+        element = np.repeat(np.arange(self.path.size), parts)
+        first = np.repeat(np.cumsum(parts) - parts, parts)
+        a = (np.arange(element.size) - first)*np.repeat(L/parts, parts)
+
+        self._loaded = np.append(self.path[element], self.path[-1])
+        self._a = np.append(a, L[-1])
+        self._b = np.append(L[element] - a, 0.0)
+        self._stations = np.append(start[element] + a, L.sum())
+
+    def load_matrix(self, batch:slice)->np.ndarray:
+        """
+        Returns the (n_free, n) free load vectors of the load positions in 'batch'
+        """
+        n = self.analysis.number_free_equations
+        loaded = self._loaded[batch]
+
+        forces = nodal_force_forces(self.force, self._a[batch], self._b[batch])
+        equations = self.analysis.element_equations[loaded]
+        columns = np.repeat(np.arange(loaded.size), 6).reshape(-1, 6)
+        free = equations < n
+
+        F = np.zeros((n, loaded.size))
+        np.add.at(F, (equations[free], columns[free]), forces[free])
+        return F
+
+    def Run(self)->None:
+        """
+        Factorizes K00 once and solves every load position, in batches of
+        'batch' right hand sides
+        """
+        start = time.perf_counter()
+        analysis = self.analysis
+        n = analysis.number_free_equations
+
+        analysis.calc_element_stiffness()
+        analysis.assemble_system()
+        self.solver.factorize(analysis.K00)
+        factorization = time.perf_counter() - start
+
+        positions = self.stations.size
+        dofs, elements = self.dofs, self.elements
+        self._displacements = np.zeros((positions, dofs.size))
+        self._element_forces = np.zeros((positions, elements.size, 6))
+
+        equations = analysis.element_equations[elements]
+        stiffness = analysis.element_stiffness[elements]
+
+        for first in range(0, positions, self.batch):
+            batch = slice(first, min(first + self.batch, positions))
+            U = np.zeros((analysis.number_equations, batch.stop - batch.start))
+            U[:n] = self.solver.solve(self.load_matrix(batch))
+
+            self._displacements[batch] = U[dofs].T
+            forces = np.einsum("eij,ejp->pei", stiffness, U[equations])
+
+            loaded = self._loaded[batch][:, None] == elements[None, :]
+            p, e = np.nonzero(loaded)
+            forces[p, e] -= nodal_force_forces(self.force, self._a[batch][p], self._b[batch][p])
+            self._element_forces[batch] = forces
+
+        self._report = {"positions": positions, "backend": self.solver.backend,
+                        "factorization_time": factorization, "time": time.perf_counter() - start}
+
+    def interpolate(self, values:np.ndarray, stations:np.ndarray)->np.ndarray:
+        """
+        Interpolates (n_positions, ...) influence 'values' linearly at 'stations'.
+        Stations outside the path give zero
+        """
+        stations = np.asarray(stations, dtype=float)
+        right = np.clip(np.searchsorted(self.stations, stations), 1, self.stations.size - 1)
+        left = right - 1
+
+        span = self.stations[right] - self.stations[left]
+        weight = np.where(span > 0, (stations - self.stations[left])/np.where(span > 0, span, 1.0), 0.0)
+        weight = weight.reshape(weight.shape + (1,)*(values.ndim - 1))
+
+        result = (1 - weight)*values[left] + weight*values[right]
+        outside = (stations < self.stations[0]) | (stations > self.stations[-1])
+        result[outside] = 0.0
+        return result
+
+    def Train(self, axles:np.ndarray, step:float = None)->dict[str, np.ndarray]:
+        """
+        Moves a vehicle load train over the path. 'axles' holds one [offset, load]
+        row per axle, offset being the distance behind the first axle and load
+        the axle force relative to 'force'. The responses are superposed from
+        the influence lines at every position of the first axle (from the path
+        start until the last axle leaves it, every 'step'). Returns the 'stations'
+        of the first axle, the 'displacements' and 'element_forces' at each of
+        them and their envelopes ('max_...' and 'min_...')
+        """
+        if self.displacements is None:
+            self.Run()
+
+        axles = np.asarray(axles, dtype=float).reshape(-1, 2)
+        step = self.step if step is None else step
+        lead = np.arange(0.0, self.length + axles[:, 0].max() + step/2, step)
+
+        responses = {"stations": lead}
+        for name, values in (("displacements", self.displacements), ("element_forces", self.element_forces)):
+            total = np.zeros((lead.size,) + values.shape[1:])
+            for offset, load in axles:
+                total += load*self.interpolate(values, lead - offset)
+
+            responses[name] = total
+            responses[f"max_{name}"] = total.max(axis=0)
+            responses[f"min_{name}"] = total.min(axis=0)
+
+        return responses
@@ -0,0 +1,212 @@
+"""
+Batched element kernels: evaluate the rotation, stiffness and mass
+matrices of every element at once, as (n_elem, 6, 6) stacks,
+instead of one TStiffElement at a time.
+"""
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import numpy as np
+
+#%% --------------------------
+#       KERNELS
+# ----------------------------
+def rotation_matrices(angle:np.ndarray)->np.ndarray:
+    """
+    Evaluates the rotation matrix of each element inclination 'angle'
+    (same layout as TStiffElement.rotate)
+    """
+    angle = np.asarray(angle, dtype=float)
+    lx = np.cos(angle)
+    ly = np.sin(angle)
+
+    R = np.zeros((angle.size, 6, 6))
+    for i in (0, 3):
+        R[:, i, i] = lx
+        R[:, i, i+1] = ly
+        R[:, i+1, i] = -ly
+        R[:, i+1, i+1] = lx
+        R[:, i+2, i+2] = 1.0
+
+    return R
+
+def local_stiffness(E:np.ndarray, A:np.ndarray, I:np.ndarray, L:np.ndarray)->np.ndarray:
+    """
+    Evaluates the local truss + beam stiffness matrix of each element
+    (same layout as TStiffElement.calc_stiff)
+    """
+    E, A, I, L = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (E, A, I, L)))
+    EA = E*A
+    EI = E*I
+
+    k = np.zeros((L.size, 6, 6))
+
+    axial = EA/L
+    k[:, 0, 0] = k[:, 3, 3] = axial
+    k[:, 0, 3] = k[:, 3, 0] = -axial
+
+    k1 = 12*EI/L**3
+    k2 = 6*EI/L**2
+    k3 = 4*EI/L
+    k4 = 2*EI/L
+
+    k[:, 1, 1] = k[:, 4, 4] = k1
+    k[:, 1, 4] = k[:, 4, 1] = -k1
+    k[:, 1, 2] = k[:, 2, 1] = k[:, 1, 5] = k[:, 5, 1] = k2
+    k[:, 4, 2] = k[:, 2, 4] = k[:, 4, 5] = k[:, 5, 4] = -k2
+    k[:, 2, 2] = k[:, 5, 5] = k3
+    k[:, 2, 5] = k[:, 5, 2] = k4
+
+    return k
+
+def global_stiffness(E:np.ndarray, A:np.ndarray, I:np.ndarray, L:np.ndarray,
+                     angle:np.ndarray)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evaluates the local stiffness, rotation and global stiffness
+    (R^T k R) stacks of every element
+    """
+    kloc = local_stiffness(E, A, I, L)
+    R = rotation_matrices(angle)
+    kel = np.einsum("eji,ejk,ekl->eil", R, kloc, R, optimize=True)
+
+    return kloc, R, kel
+
+def local_mass(rho:np.ndarray, A:np.ndarray, L:np.ndarray, lumped:bool = False)->np.ndarray:
+    """
+    Evaluates the local mass matrix of each element (same layout as 
+    TStiffElement.mass). The consistent matrix uses the linear (axial) and
+    cubic Hermite (bending) shape functions of the stiffness matrix. The 
+    lumped one puts half of the mass on the translations of each node and
+    the rotary inertia of half the element, m L^2/24, on its rotations
+    """
+    rho, A, L = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (rho, A, L)))
+    mass = rho*A*L
+
+    m = np.zeros((L.size, 6, 6))
+
+    if lumped:
+        m[:, 0, 0] = m[:, 1, 1] = m[:, 3, 3] = m[:, 4, 4] = mass/2
+        m[:, 2, 2] = m[:, 5, 5] = mass*L**2/24
+        return m
+
+    c = mass/420
+    m[:, 0, 0] = m[:, 3, 3] = 140*c
+    m[:, 0, 3] = m[:, 3, 0] = 70*c
+
+    m[:, 1, 1] = m[:, 4, 4] = 156*c
+    m[:, 1, 4] = m[:, 4, 1] = 54*c
+    m[:, 1, 2] = m[:, 2, 1] = 22*L*c
+    m[:, 4, 5] = m[:, 5, 4] = -22*L*c
+    m[:, 1, 5] = m[:, 5, 1] = -13*L*c
+    m[:, 4, 2] = m[:, 2, 4] = 13*L*c
+    m[:, 2, 2] = m[:, 5, 5] = 4*L**2*c
+    m[:, 2, 5] = m[:, 5, 2] = -3*L**2*c
+
+    return m
+
+def global_mass(rho:np.ndarray, A:np.ndarray, L:np.ndarray, angle:np.ndarray,
+                lumped:bool = False)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evaluates the local mass, rotation and global mass (R^T m R) stacks 
+    of every element
+    """
+    mloc = local_mass(rho, A, L, lumped)
+    R = rotation_matrices(angle)
+    mel = np.einsum("eji,ejk,ekl->eil", R, mloc, R, optimize=True)
+
+    return mloc, R, mel
+
+def local_geometric_stiffness(N:np.ndarray, L:np.ndarray)->np.ndarray:
+    """
+    Evaluates the local geometric stiffness matrix of each element under 
+    the axial force 'N' (tension positive), consistent with the cubic 
+    Hermite shape functions (same layout as TStiffElement.geometric_stiffness)
+    """
+    N, L = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (N, L)))
+    c = N/(30*L)
+
+    k = np.zeros((L.size, 6, 6))
+    k[:, 1, 1] = k[:, 4, 4] = 36*c
+    k[:, 1, 4] = k[:, 4, 1] = -36*c
+    k[:, 1, 2] = k[:, 2, 1] = k[:, 1, 5] = k[:, 5, 1] = 3*L*c
+    k[:, 4, 2] = k[:, 2, 4] = k[:, 4, 5] = k[:, 5, 4] = -3*L*c
+    k[:, 2, 2] = k[:, 5, 5] = 4*L**2*c
+    k[:, 2, 5] = k[:, 5, 2] = -L**2*c
+
+    return k
+
+def global_geometric_stiffness(N:np.ndarray, L:np.ndarray, 
+                               angle:np.ndarray)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evaluates the local geometric stiffness, rotation and global geometric
+    stiffness (R^T kg R) stacks of every element
+    """
+    kgloc = local_geometric_stiffness(N, L)
+    R = rotation_matrices(angle)
+    kg = np.einsum("eji,ejk,ekl->eil", R, kgloc, R, optimize=True)
+
+    return kgloc, R, kg
+
+def axial_forces(E:np.ndarray, A:np.ndarray, L:np.ndarray, angle:np.ndarray, uel:np.ndarray)->np.ndarray:
+    """
+    Evaluates the axial force (tension positive) of each element from its 
+    global displacements 'uel', (n_elem, 6) or (n_elem, 6, n_cases)
+    """
+    local = np.einsum("eij,ej...->ei...", rotation_matrices(angle), uel)
+    stiffness = np.asarray(E*A/L, dtype=float).reshape((-1,) + (1,)*(uel.ndim - 2))
+
+    return stiffness*(local[:, 3] - local[:, 0])
+
+def element_arrays(elements:list)->tuple[np.ndarray, ...]:
+    """
+    Gathers the E, A, I, length and angle arrays of a list of TStiffElement
+    """
+    E = np.fromiter((e.mechanical_prop.E for e in elements), float, len(elements))
+    A = np.fromiter((e.geometric_prop.area for e in elements), float, len(elements))
+    I = np.fromiter((e.geometric_prop.inertia for e in elements), float, len(elements))
+    L = np.fromiter((e.length for e in elements), float, len(elements))
+    angle = np.fromiter((e.angle for e in elements), float, len(elements))
+
+    return E, A, I, L, angle
+
+def mass_arrays(elements:list)->tuple[np.ndarray, ...]:
+    """
+    Gathers the density, A, length and angle arrays of a list of TStiffElement
+    """
+    rho = np.fromiter((e.mechanical_prop.density for e in elements), float, len(elements))
+    A = np.fromiter((e.geometric_prop.area for e in elements), float, len(elements))
+    L = np.fromiter((e.length for e in elements), float, len(elements))
+    angle = np.fromiter((e.angle for e in elements), float, len(elements))
+
+    return rho, A, L, angle
+
+def uniform_load_forces(q:np.ndarray, length:np.ndarray)->np.ndarray:
+    """
+    Evaluates the (n, 6) fixed-end forces of uniform loads 'q' applied over
+    'length' (same layout as TStiffLoad 'uniform load')
+    """
+    q, l = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(length, dtype=float))
+
+    forces = np.zeros(q.shape + (6,))
+    forces[..., 1] = forces[..., 4] = q*l/2
+    forces[..., 2] = q*l**2/12
+    forces[..., 5] = -q*l**2/12
+
+    return forces
+
+def nodal_force_forces(P:np.ndarray, a:np.ndarray, b:np.ndarray)->np.ndarray:
+    """
+    Evaluates the (n, 6) fixed-end forces of point forces 'P' applied at 
+    distances 'a' and 'b' from the element nodes (same layout as 
+    TStiffLoad 'nodal force')
+    """
+    P, a, b = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (P, a, b)))
+    l = a + b
+
+    forces = np.zeros(P.shape + (6,))
+    forces[..., 1] = P*b**2*(3*a+b)/l**3
+    forces[..., 2] = P*a*b**2/l**2
+    forces[..., 4] = P*a**2*(a+3*b)/l**3
+    forces[..., 5] = -P*a**2*b/l**2
+
+    return forces
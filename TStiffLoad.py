@@ -4,6 +4,8 @@
 import numpy as np
 from tpanic import DebugStop
 from dataclasses import dataclass, field
+from typing import ClassVar
+from TStiffCache import TStiffCache
 
 @dataclass
 class TStiffLoad:
@@ -25,15 +27,27 @@ class TStiffLoad:
             * force = applied nodal force magnitude
             * a = distance from the left node
             * b = distance from the right node
+
+    'cache' (shared by every load, None to disable) stores the reaction
+    forces, so identical loads share one read-only vector (see TStiffCache)
     """
 #%% --------------------------
 #       INITIALIZER
 # ----------------------------
+    cache: ClassVar[TStiffCache] = TStiffCache()
+
     _load_type: tuple[str, dict[str, float]] = field(default_factory=tuple)
     _reaction_forces: np.ndarray = field(init=False)
 
     def __post_init__(self):
-        self._reaction_forces = self.calc_reaction_forces()
+        if self.cache is None:
+            self._reaction_forces = self.calc_reaction_forces()
+            return
+
+        load_type, kwargs = self.load_type
+        names = sorted(kwargs)
+        key = (*self.cache.key(load_type, *(kwargs[name] for name in names)), *names)
+        self._reaction_forces = self.cache.get(key, self.calc_reaction_forces)
 
 #%% --------------------------
 #       GETTERS & SETTERS
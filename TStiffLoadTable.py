@@ -0,0 +1,157 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import numpy as np
+from dataclasses import dataclass
+from typing import ClassVar
+from tpanic import DebugStop
+from TStiffModel import TStiffModel
+from TStiffKernel import uniform_load_forces, nodal_force_forces
+
+@dataclass
+class TStiffLoadTable:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Batched table of element loads, one row per load, used by TStiffLoader.
+    The fixed-end forces of every row are evaluated with one kernel call per
+    load type (same values as TStiffLoad.calc_reaction_forces), validated at
+    once and scattered into the element load vectors with np.add.at.
+
+    Provide:
+        - 'types': (k,) load type of each row, as names or positions in 'load_types'
+        - 'elements': (k,) position of the loaded element
+        - 'values': (k,) 'load' of a 'uniform load' or 'force' of a 'nodal force'
+        - 'length': (k,) loaded length of a 'uniform load' (NaN: the element length)
+        - 'a', 'b': (k,) distances of a 'nodal force' from the element nodes
+        - 'cases': (k,) load case of each row (default: 'default')
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    load_types: ClassVar[list[str]] = ["uniform load", "nodal force"]
+
+    _types: np.ndarray
+    _elements: np.ndarray
+    _values: np.ndarray
+    _length: np.ndarray = None
+    _a: np.ndarray = None
+    _b: np.ndarray = None
+    _cases: np.ndarray = None
+
+    def __post_init__(self):
+        types = np.asarray(self._types)
+        if types.dtype.kind in "US":
+            codes = np.array([self.load_types.index(t) if t in self.load_types else -1 for t in types.tolist()],
+                             dtype=np.int8).reshape(types.shape)
+            if np.any(codes < 0):
+                print(f"ERROR: load type not defined ({types[codes < 0][0]})")
+                DebugStop()
+            types = codes
+        elif np.any(undefined := (types < 0) | (types >= len(self.load_types))):
+            print(f"ERROR: load type not defined ({types[undefined].ravel()[0]})")
+            DebugStop()
+
+        self._types = types.astype(np.int8).ravel()
+        self._elements = np.asarray(self._elements, dtype=np.int64).ravel()
+        self._values = np.asarray(self._values, dtype=float).ravel()
+
+        k = self._types.size
+        column = lambda values, default: (np.full(k, default, dtype=float) if values is None
+                                          else np.broadcast_to(np.asarray(values, dtype=float), (k,)).copy())
+        self._length = column(self._length, np.nan)
+        self._a = column(self._a, 0.0)
+        self._b = column(self._b, 0.0)
+        self._cases = (np.full(k, "default", dtype=object) if self._cases is None
+                       else np.broadcast_to(np.asarray(self._cases, dtype=object), (k,)).copy())
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def types(self): return self._types
+
+    @property
+    def elements(self): return self._elements
+
+    @property
+    def values(self): return self._values
+
+    @property
+    def length(self): return self._length
+
+    @property
+    def a(self): return self._a
+
+    @property
+    def b(self): return self._b
+
+    @property
+    def cases(self): return self._cases
+
+    @property
+    def case_names(self): return list(dict.fromkeys(self.cases.tolist()))
+
+    def __len__(self): return self.types.size
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def check_values(self, lengths:np.ndarray)->None:
+        """
+        Checks every row against the length of its element ('lengths' of all
+        the elements), as TStiffElement.check_values does for one load
+        """
+        if np.any((self.elements < 0) | (self.elements >= lengths.size)):
+            print("ERROR: loaded element not found")
+            DebugStop()
+
+        element_length = lengths[self.elements]
+        uniform, nodal = self.types == 0, self.types == 1
+
+        if np.any(uniform & (self.length > element_length)):
+            print("ERROR: Applied load length greater than element length")
+            DebugStop()
+        if np.any(nodal & (self.a + self.b > element_length)):
+            print("ERROR: a + b greater than element length")
+            DebugStop()
+
+    def reaction_forces(self, lengths:np.ndarray)->np.ndarray:
+        """
+        Evaluates the (k, 6) fixed-end forces of every row, one kernel call
+        per load type
+        """
+        self.check_values(lengths)
+
+        uniform, nodal = self.types == 0, self.types == 1
+        length = np.where(np.isnan(self.length), lengths[self.elements], self.length)
+
+        forces = np.zeros((len(self), 6))
+        forces[uniform] = uniform_load_forces(self.values[uniform], length[uniform])
+        forces[nodal] = nodal_force_forces(self.values[nodal], self.a[nodal], self.b[nodal])
+        return forces
+
+    def element_loads(self, lengths:np.ndarray)->dict[str, np.ndarray]:
+        """
+        Returns the (n_elem, 6) element load vectors of each load case
+        """
+        forces = self.reaction_forces(lengths)
+        loads = {}
+
+        for case in self.case_names:
+            rows = self.cases == case
+            np.add.at(loads.setdefault(case, np.zeros((lengths.size, 6))), self.elements[rows], forces[rows])
+
+        return loads
+
+    def apply(self, model:TStiffModel)->None:
+        """
+        Adds the loads to the load vectors of 'model' ('loads' and 'case_loads')
+        """
+        for case, loads in self.element_loads(model.lengths()).items():
+            if case == "default":
+                model.loads += loads
+            else:
+                model.case_loads.setdefault(case, np.zeros((model.number_of_elements, 6)))
+                model.case_loads[case] += loads
@@ -0,0 +1,269 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import os
+import csv
+import json
+import math
+import numpy as np
+from dataclasses import dataclass, field
+from tpanic import DebugStop
+from TStiffModel import TStiffModel
+from TStiffAnalysis import TStiffAnalysis
+from TStiffLoadTable import TStiffLoadTable
+
+@dataclass
+class TStiffLoader:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Reads a model from CSV or JSON tables straight into a TStiffModel,
+    without creating one Python object per node, element or load.
+
+    'path' is either a directory holding one CSV file per table (with a
+    header row) or a single JSON file with one entry per table. A JSON
+    table is a list of records ([{"id": 0, "x": 0.0, ...}, ...]) or a
+    dictionary of columns ({"id": [...], "x": [...], ...}).
+
+    Tables (optional ones may be missing, optional columns may be empty):
+        - nodes: id, x, y, support, hinge
+            * support: 'Free', 'RollerX', 'RollerY', 'Pinned', 'Fixed' (default 'Free')
+            * hinge: 1/true for hinged nodes (default 0)
+        - sections: id, type, base, height, radius, area, inertia
+            * 'area' and 'inertia' are used when given, otherwise they are computed
+              for type 'Rectangle' (base, height) or 'Circular' (radius)
+        - materials: id, E, poisson, density
+            * density: mass per unit volume (default 0, needed by dynamic analyses)
+        - elements: id, node1, node2, section, material
+        - springs (optional): node, type, value
+            * type: 'TransX', 'TransY', 'Rot'
+        - displacements (optional): node, type, value
+            * type: 'Xdisp', 'Ydisp', 'Rot'
+        - loads (optional): element, type, value, length, a, b, case
+            * type 'uniform load': value = load, length = loaded length (default: element length)
+            * type 'nodal force': value = force, a/b = distances from the element nodes
+            * case: load case name (default: the 'default' case)
+
+    Ids are any integers; elements, springs, displacements and loads refer
+    to nodes, sections, materials and elements by id.
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _path: str
+    _tables: dict = field(init=False, repr=False, default=None)
+
+    def __post_init__(self):
+        if os.path.isfile(self._path):
+            with open(self._path) as f:
+                self._tables = json.load(f)
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def path(self): return self._path
+    @path.setter
+    def path(self, path): self._path = path
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def read_table(self, name:str, required:bool = True)->dict[str, np.ndarray]:
+        """
+        Reads the table 'name' as a dictionary of string columns
+        """
+        if self._tables is not None:
+            table = self._tables.get(name)
+            if isinstance(table, list):
+                keys = dict.fromkeys(key for record in table for key in record)
+                table = {key: [record.get(key, "") for record in table] for key in keys}
+        else:
+            path = os.path.join(self.path, f"{name}.csv")
+            table = None
+            if os.path.isfile(path):
+                with open(path, newline="") as f:
+                    reader = csv.reader(f, skipinitialspace=True)
+                    header = [key.strip() for key in next(reader)]
+                    rows = [row for row in reader if row]
+                    columns = zip(*rows) if rows else [() for _ in header]
+                    table = dict(zip(header, columns))
+
+        if table is None:
+            if required:
+                print(f"ERROR: model table not found ({name})")
+                DebugStop()
+            return {}
+
+        return {key: np.array(["" if v is None else str(v).strip() for v in values], dtype=str)
+                for key, values in table.items()}
+
+    @staticmethod
+    def column(table:dict, key:str, dtype=float, default=None, size:int = 0)->np.ndarray:
+        """
+        Converts the string column 'key' to 'dtype'. Missing columns and
+        empty values take 'default'
+        """
+        size = len(next(iter(table.values()))) if table else size
+        values = table.get(key)
+
+        if values is None:
+            if default is None:
+                print(f"ERROR: model column not found ({key})")
+                DebugStop()
+            return np.full(size, default, dtype=object if dtype is str else dtype)
+
+        if dtype is str:
+            return np.where(values == "", default if default is not None else "", values)
+
+        empty = values == ""
+        if empty.any():
+            if default is None:
+                print(f"ERROR: empty values in model column ({key})")
+                DebugStop()
+            values = np.where(empty, str(default), values)
+
+        if dtype is bool:
+            return np.isin(np.char.lower(values), ["1", "true", "yes"])
+
+        return values.astype(float).astype(dtype)
+
+    @staticmethod
+    def positions(ids:np.ndarray, references:np.ndarray, name:str)->np.ndarray:
+        """
+        Maps the 'references' to the positions of 'ids'
+        """
+        order = np.argsort(ids, kind="stable")
+        found = np.minimum(np.searchsorted(ids, references, sorter=order), max(ids.size - 1, 0))
+
+        missing = references[ids[order][found] != references] if ids.size else references
+        if missing.size:
+            print(f"ERROR: undefined {name} ids ({missing[:5].tolist()})")
+            DebugStop()
+
+        return order[found]
+
+    @staticmethod
+    def codes(values:np.ndarray, names:list[str], name:str)->np.ndarray:
+        """
+        Converts names (or integer codes) to positions in 'names'
+        """
+        lookup = {key: i for i, key in enumerate(names)}
+        lookup.update({str(i): i for i in range(len(names))})
+
+        unique, inverse = np.unique(values, return_inverse=True)
+        undefined = [key for key in unique if key not in lookup]
+        if undefined:
+            print(f"ERROR: {name} not defined ({undefined})")
+            DebugStop()
+
+        return np.array([lookup[key] for key in unique], dtype=np.int64)[inverse].reshape(-1)
+
+    def load_sections(self)->tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the section ids and the [area, inertia] table
+        """
+        table = self.read_table("sections")
+        ids = self.column(table, "id", np.int64)
+        kind = self.column(table, "type", str, "")
+        base = self.column(table, "base", float, np.nan)
+        height = self.column(table, "height", float, np.nan)
+        radius = self.column(table, "radius", float, np.nan)
+
+        area = np.where(kind == "Circular", math.pi*radius**2, base*height)
+        inertia = np.where(kind == "Circular", math.pi*radius**4/4, base*height**3/12)
+
+        area = np.where(np.isnan(given := self.column(table, "area", float, np.nan)), area, given)
+        inertia = np.where(np.isnan(given := self.column(table, "inertia", float, np.nan)), inertia, given)
+
+        if np.any(np.isnan(area) | np.isnan(inertia)):
+            print("ERROR: section without area/inertia or without the dimensions of its type")
+            DebugStop()
+
+        return ids, np.column_stack([area, inertia])
+
+    def load_prescribed(self, name:str, types:list[str], node_ids:np.ndarray)->np.ndarray:
+        """
+        Returns the [node, dof, value] rows of the 'springs' or 'displacements' table
+        """
+        table = self.read_table(name, required=False)
+        if not table:
+            return np.zeros((0, 3))
+
+        nodes = self.positions(node_ids, self.column(table, "node", np.int64), "node")
+        dofs = self.codes(self.column(table, "type", str), types, f"{name} type")
+
+        return np.column_stack([nodes, dofs, self.column(table, "value")])
+
+    def load_model(self)->TStiffModel:
+        """
+        Reads every table and builds the TStiffModel
+        """
+        nodes = self.read_table("nodes")
+        node_ids = self.column(nodes, "id", np.int64)
+        supports = self.codes(self.column(nodes, "support", str, "Free"), TStiffModel.support_types, "support type")
+
+        section_ids, sections = self.load_sections()
+
+        materials = self.read_table("materials")
+        material_ids = self.column(materials, "id", np.int64)
+        material_table = np.column_stack([self.column(materials, "E"), self.column(materials, "poisson", float, 0.0),
+                                          self.column(materials, "density", float, 0.0)])
+
+        elements = self.read_table("elements")
+        element_ids = self.column(elements, "id", np.int64)
+        connectivity = np.column_stack([self.positions(node_ids, self.column(elements, "node1", np.int64), "node"),
+                                        self.positions(node_ids, self.column(elements, "node2", np.int64), "node")])
+
+        springs = self.load_prescribed("springs", ['TransX', 'TransY', 'Rot'], node_ids)
+        displacements = self.load_prescribed("displacements", ['Xdisp', 'Ydisp', 'Rot'], node_ids)
+
+        free = TStiffModel.free_dof[supports]
+        if np.any(~free[springs[:, 0].astype(int), springs[:, 1].astype(int)]):
+            print("ERROR: You cannot prescribe a spring to a constrained degree of freedom")
+            DebugStop()
+        if np.any(free[displacements[:, 0].astype(int), displacements[:, 1].astype(int)]):
+            print("ERROR: You cannot prescribe a displacement to a free degree of freedom")
+            DebugStop()
+
+        model = TStiffModel(_coordinates = np.column_stack([self.column(nodes, "x"), self.column(nodes, "y")]),
+                            _supports = supports,
+                            _connectivity = connectivity,
+                            _sections = sections,
+                            _materials = material_table,
+                            _section_ids = self.positions(section_ids, self.column(elements, "section", np.int64), "section"),
+                            _material_ids = self.positions(material_ids, self.column(elements, "material", np.int64), "material"),
+                            _hinges = self.column(nodes, "hinge", bool, 0),
+                            _springs = springs,
+                            _displacements = displacements,
+                            _node_index = node_ids,
+                            _element_index = element_ids)
+
+        self.load_loads(model, element_ids)
+        return model
+
+    def load_loads(self, model:TStiffModel, element_ids:np.ndarray)->None:
+        """
+        Evaluates the fixed-end forces of the 'loads' table and adds them
+        to the model load vectors of each load case
+        """
+        table = self.read_table("loads", required=False)
+        if not table:
+            return
+
+        elements = self.positions(element_ids, self.column(table, "element", np.int64), "element")
+        kind = self.codes(self.column(table, "type", str), TStiffLoadTable.load_types, "load type")
+
+        loads = TStiffLoadTable(_types=kind, _elements=elements, _values=self.column(table, "value"),
+                                _length=self.column(table, "length", float, np.nan),
+                                _a=self.column(table, "a", float, 0.0), _b=self.column(table, "b", float, 0.0),
+                                _cases=self.column(table, "case", str, "default").astype(object))
+        loads.apply(model)
+
+    def load_analysis(self, **kwargs)->TStiffAnalysis:
+        """
+        Reads the model and returns a TStiffAnalysis on it. 'kwargs' are
+        passed to TStiffAnalysis (e.g. _sparse=True)
+        """
+        return TStiffAnalysis(_model=self.load_model(), **kwargs)
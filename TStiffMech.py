@@ -12,6 +12,7 @@ class TStiffMech:
     Provides the mechanical properties of a given material.
         - E: Young Modulus
         - poisson: Poisson Ration
+        - density: mass per unit volume (used by mass matrices, 0 for static analyses)
         - G: Shear Modulus (authomaticallu computed)
     """
 #%% --------------------------
@@ -19,6 +20,7 @@ class TStiffMech:
 # ----------------------------
     _E: float
     _poisson: float 
+    _density: float = 0.0
     _G: float = field(init=False)
 
     def __post_init__(self): 
@@ -30,14 +32,19 @@ class TStiffMech:
     @property
     def E(self): return self._E
     @E.setter
-    def E(self, E): self.E = E
+    def E(self, E): self._E = E
 
     @property
     def poisson(self): return self._poisson
     @poisson.setter
-    def poisson(self, poisson): self.poisson = poisson
+    def poisson(self, poisson): self._poisson = poisson
+
+    @property
+    def density(self): return self._density
+    @density.setter
+    def density(self, rho): self._density = rho
 
     @property
     def G(self): return self._G
     @G.setter
-    def G(self, G): self.G = G
\ No newline at end of file
+    def G(self, G): self._G = G
\ No newline at end of file
@@ -0,0 +1,354 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import numpy as np
+from dataclasses import dataclass, field
+from typing import ClassVar
+from TStiffElement import TStiffElement
+from TStiffNode import TStiffNode
+from TStiffRegistry import TStiffRegistry
+from TStiffGeo import TStiffGeo
+from TStiffMech import TStiffMech
+
+@dataclass
+class TStiffModel:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Array-backed (struct-of-arrays) representation of a structure. It holds
+    the same data as the TStiffNode/TStiffElement objects without creating
+    one Python object per entity, and TStiffAnalysis can run on it directly.
+
+    Provide:
+        - 'coordinates': (n, 2) node coordinates
+        - 'supports': (n,) int8 support codes, positions in 'support_types'
+        - 'connectivity': (m, 2) node positions of each element
+        - 'sections': (n_sec, 2) section table [area, inertia]
+        - 'materials': (n_mat, 3) material table [E, poisson, density]. A
+          (n_mat, 2) table [E, poisson] is given a zero density
+        - 'section_ids': (m,) section of each element
+        - 'material_ids': (m,) material of each element
+        - 'hinges': (n,) True for hinged nodes
+        - 'loads': (m, 6) element load vectors ('default' load case)
+        - 'case_loads': {load case: (m, 6) element load vectors}
+        - 'springs': (k, 3) prescribed springs [node, dof, value]
+        - 'displacements': (k, 3) prescribed displacements [node, dof, value]
+        - 'node_index': (n,) TStiffNode index of each node (when built from objects)
+        - 'element_index': (m,) TStiffElement index of each element (when built from objects)
+
+    dof codes are 0: x direction, 1: y direction, 2: rotation
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    support_types: ClassVar[list[str]] = ['Free', 'RollerX', 'RollerY', 'Pinned', 'Fixed']
+    free_dof: ClassVar[np.ndarray] = np.array([[1, 1, 1], [1, 0, 1], [0, 1, 1], [0, 0, 1], [0, 0, 0]], dtype=bool)
+
+    _coordinates: np.ndarray
+    _supports: np.ndarray
+    _connectivity: np.ndarray
+    _sections: np.ndarray
+    _materials: np.ndarray
+    _section_ids: np.ndarray
+    _material_ids: np.ndarray
+    _hinges: np.ndarray = None
+    _loads: np.ndarray = None
+    _case_loads: dict[str, np.ndarray] = field(default_factory=dict)
+    _springs: np.ndarray = None
+    _displacements: np.ndarray = None
+    _node_index: np.ndarray = None
+    _element_index: np.ndarray = None
+
+    def __post_init__(self):
+        self._coordinates = np.asarray(self._coordinates, dtype=float).reshape(-1, 2)
+        self._supports = np.asarray(self._supports, dtype=np.int8)
+        self._connectivity = np.asarray(self._connectivity, dtype=np.int64).reshape(-1, 2)
+        self._sections = np.asarray(self._sections, dtype=float).reshape(-1, 2)
+        materials = np.asarray(self._materials, dtype=float)
+        materials = materials.reshape(-1, materials.shape[-1] if materials.ndim == 2 else 2)
+        self._materials = np.pad(materials, ((0, 0), (0, 3 - materials.shape[1])))
+        self._section_ids = np.asarray(self._section_ids, dtype=np.int32)
+        self._material_ids = np.asarray(self._material_ids, dtype=np.int32)
+
+        n, m = self.number_of_nodes, self.number_of_elements
+
+        self._hinges = np.zeros(n, dtype=bool) if self._hinges is None else np.asarray(self._hinges, dtype=bool)
+        self._loads = np.zeros((m, 6)) if self._loads is None else np.asarray(self._loads, dtype=float)
+        self._springs = np.zeros((0, 3)) if self._springs is None else np.asarray(self._springs, dtype=float).reshape(-1, 3)
+        self._displacements = (np.zeros((0, 3)) if self._displacements is None
+                               else np.asarray(self._displacements, dtype=float).reshape(-1, 3))
+        self._node_index = np.arange(n) if self._node_index is None else np.asarray(self._node_index)
+        self._element_index = np.arange(m) if self._element_index is None else np.asarray(self._element_index)
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def coordinates(self): return self._coordinates
+    @coordinates.setter
+    def coordinates(self, coordinates): self._coordinates = coordinates
+
+    @property
+    def supports(self): return self._supports
+    @supports.setter
+    def supports(self, supports): self._supports = supports
+
+    @property
+    def connectivity(self): return self._connectivity
+    @connectivity.setter
+    def connectivity(self, connectivity): self._connectivity = connectivity
+
+    @property
+    def sections(self): return self._sections
+    @sections.setter
+    def sections(self, sections): self._sections = sections
+
+    @property
+    def materials(self): return self._materials
+    @materials.setter
+    def materials(self, materials): self._materials = materials
+
+    @property
+    def section_ids(self): return self._section_ids
+    @section_ids.setter
+    def section_ids(self, ids): self._section_ids = ids
+
+    @property
+    def material_ids(self): return self._material_ids
+    @material_ids.setter
+    def material_ids(self, ids): self._material_ids = ids
+
+    @property
+    def hinges(self): return self._hinges
+    @hinges.setter
+    def hinges(self, hinges): self._hinges = hinges
+
+    @property
+    def loads(self): return self._loads
+    @loads.setter
+    def loads(self, loads): self._loads = loads
+
+    @property
+    def case_loads(self): return self._case_loads
+    @case_loads.setter
+    def case_loads(self, loads): self._case_loads = loads
+
+    @property
+    def springs(self): return self._springs
+    @springs.setter
+    def springs(self, springs): self._springs = springs
+
+    @property
+    def displacements(self): return self._displacements
+    @displacements.setter
+    def displacements(self, displacements): self._displacements = displacements
+
+    @property
+    def node_index(self): return self._node_index
+    @node_index.setter
+    def node_index(self, index): self._node_index = index
+
+    @property
+    def element_index(self): return self._element_index
+    @element_index.setter
+    def element_index(self, index): self._element_index = index
+
+    @property
+    def number_of_nodes(self): return self.coordinates.shape[0]
+
+    @property
+    def number_of_elements(self): return self.connectivity.shape[0]
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    @classmethod
+    def from_elements(cls, elements:list[TStiffElement])->"TStiffModel":
+        """
+        Builds the array representation of a structure given as a list
+        of TStiffElement. Nodes keep the order in which they first appear
+        """
+        disp_to_DoF = {'Xdisp': 0, 'Ydisp': 1, 'Rot': 2}
+        spring_to_DoF = {'TransX': 0, 'TransY': 1, 'Rot': 2}
+
+        nodes, sections, materials = {}, {}, {}
+        connectivity = np.empty((len(elements), 2), dtype=np.int64)
+        section_ids = np.empty(len(elements), dtype=np.int32)
+        material_ids = np.empty(len(elements), dtype=np.int32)
+
+        for k, element in enumerate(elements):
+            for j, node in enumerate(element.nodes):
+                connectivity[k, j] = nodes.setdefault(node.index, (len(nodes), node))[0]
+
+            section_ids[k] = sections.setdefault(id(element.geometric_prop), (len(sections), element.geometric_prop))[0]
+            material_ids[k] = materials.setdefault(id(element.mechanical_prop), (len(materials), element.mechanical_prop))[0]
+
+        node_list = [node for _, node in nodes.values()]
+        support_code = {support: i for i, support in enumerate(cls.support_types)}
+
+        springs = [(i, spring_to_DoF[kind], value) for i, node in enumerate(node_list) for kind, value in node.springs]
+        displacements = [(i, disp_to_DoF[kind], value) for i, node in enumerate(node_list)
+                         for kind, value in node.nodal_displacement]
+
+        case_loads = {}
+        for k, element in enumerate(elements):
+            for case, load in element.case_loads.items():
+                case_loads.setdefault(case, np.zeros((len(elements), 6)))[k] = load
+
+        return cls(_coordinates = np.array([node.coordinates for node in node_list], dtype=float),
+                   _supports = np.array([support_code[node.support_type] for node in node_list], dtype=np.int8),
+                   _connectivity = connectivity,
+                   _sections = np.array([[geo.area, geo.inertia] for _, geo in sections.values()]),
+                   _materials = np.array([[mech.E, mech.poisson, mech.density] for _, mech in materials.values()]),
+                   _section_ids = section_ids,
+                   _material_ids = material_ids,
+                   _hinges = np.array([node.hinge for node in node_list], dtype=bool),
+                   _loads = np.array([element.fel for element in elements]).reshape(-1, 6),
+                   _case_loads = case_loads,
+                   _springs = np.array(springs, dtype=float),
+                   _displacements = np.array(displacements, dtype=float),
+                   _node_index = np.array([node.index for node in node_list]),
+                   _element_index = np.array([element.index for element in elements]))
+
+    def to_elements(self)->list[TStiffElement]:
+        """
+        Builds the TStiffNode/TStiffElement objects of the model, indexed by
+        a new TStiffRegistry. Sections become the 'Rectangle' with the same
+        area and inertia
+        """
+        DoF_to_disp = ['Xdisp', 'Ydisp', 'Rot']
+        DoF_to_spring = ['TransX', 'TransY', 'Rot']
+
+        registry = TStiffRegistry()
+        nodes = [TStiffNode(_coordinates=list(xy), _support_type=self.support_types[support], _registry=registry)
+                 for xy, support in zip(self.coordinates.tolist(), self.supports.tolist())]
+
+        for i in np.flatnonzero(self.hinges).tolist():
+            nodes[i].is_hinge()
+        for node, dof, value in self.springs.tolist():
+            nodes[int(node)].prescribed_spring([(DoF_to_spring[int(dof)], value)])
+        for node, dof, value in self.displacements.tolist():
+            nodes[int(node)].prescribed_displacement([(DoF_to_disp[int(dof)], value)])
+
+        height = np.sqrt(12*self.sections[:, 1]/self.sections[:, 0])
+        sections = [TStiffGeo(_section_type=("Rectangle", {"base": area/h, "height": h}))
+                    for area, h in zip(self.sections[:, 0].tolist(), height.tolist())]
+        materials = [TStiffMech(_E=E, _poisson=poisson, _density=rho) for E, poisson, rho in self.materials.tolist()]
+
+        elements = []
+        for k, (n1, n2) in enumerate(self.connectivity.tolist()):
+            element = TStiffElement(_nodes=[nodes[n1], nodes[n2]],
+                                    _mechanical_prop=materials[self.material_ids[k]],
+                                    _geometric_prop=sections[self.section_ids[k]])
+            element.fel += self.loads[k]
+            for case, loads in self.case_loads.items():
+                element.case_loads[case] = loads[k].copy()
+            elements.append(element)
+
+        return elements
+
+    def lengths(self, positions:np.ndarray = None)->np.ndarray:
+        """
+        Calculates the length of every element (or of the elements in 'positions')
+        """
+        connectivity = self.connectivity if positions is None else self.connectivity[positions]
+        d = np.diff(self.coordinates[connectivity], axis=1)[:, 0]
+        return np.hypot(d[:, 0], d[:, 1])
+
+    def angles(self, lengths:np.ndarray = None, positions:np.ndarray = None)->np.ndarray:
+        """
+        Calculates the inclination angle of every element (or of the elements 
+        in 'positions'), with the same convention as TStiffElement.Angle
+        """
+        connectivity = self.connectivity if positions is None else self.connectivity[positions]
+        lengths = self.lengths(positions) if lengths is None else lengths
+        dy = self.coordinates[connectivity[:, 1], 1] - self.coordinates[connectivity[:, 0], 1]
+        return np.arcsin(dy/lengths)
+
+    def element_properties(self, positions:np.ndarray = None)->tuple[np.ndarray, ...]:
+        """
+        Returns the E, A, I, length and angle arrays of every element
+        (or of the elements in 'positions')
+        """
+        section_ids = self.section_ids if positions is None else self.section_ids[positions]
+        material_ids = self.material_ids if positions is None else self.material_ids[positions]
+
+        L = self.lengths(positions)
+        E = self.materials[material_ids, 0]
+        A = self.sections[section_ids, 0]
+        I = self.sections[section_ids, 1]
+
+        return E, A, I, L, self.angles(L, positions)
+
+    def mass_properties(self, positions:np.ndarray = None)->tuple[np.ndarray, ...]:
+        """
+        Returns the density, A, length and angle arrays of every element
+        (or of the elements in 'positions')
+        """
+        section_ids = self.section_ids if positions is None else self.section_ids[positions]
+        material_ids = self.material_ids if positions is None else self.material_ids[positions]
+
+        L = self.lengths(positions)
+        return self.materials[material_ids, 2], self.sections[section_ids, 0], L, self.angles(L, positions)
+
+    def connection_slots(self)->tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the number of elements connected to each node and, for
+        each element end, its position among the node's connections
+        """
+        ends = self.connectivity.ravel()
+        connections = np.bincount(ends, minlength=self.number_of_nodes)
+
+        order = np.argsort(ends, kind='stable')
+        first = np.cumsum(connections) - connections
+        slots = np.empty_like(ends)
+        slots[order] = np.arange(ends.size) - first[ends[order]]
+
+        return connections, slots.reshape(-1, 2)
+
+    def number_equations(self)->tuple[np.ndarray, np.ndarray, int, int]:
+        """
+        Numbers the degrees of freedom, free equations first and then the
+        constrained ones, node after node. A hinged node gets one extra
+        free rotation per connection after the first.
+
+        Returns the (n, 3) node equations, the (m, 6) element equations,
+        the number of equations and the number of free equations
+        """
+        free = self.free_dof[self.supports]
+        connections, slots = self.connection_slots()
+        hinge_equations = np.where(self.hinges, np.maximum(connections - 1, 0), 0)
+
+        node_equations = np.empty((self.number_of_nodes, 3), dtype=np.int64)
+
+        free_count = free.sum(axis=1) + hinge_equations
+        free_offset = np.cumsum(free_count) - free_count
+        node_equations[free] = (free_offset[:, None] + np.cumsum(free, axis=1) - 1)[free]
+        first_hinge_equation = free_offset + free.sum(axis=1)
+        number_free_equations = int(free_count.sum())
+
+        constrained = ~free
+        constrained_count = constrained.sum(axis=1)
+        constrained_offset = number_free_equations + np.cumsum(constrained_count) - constrained_count
+        node_equations[constrained] = (constrained_offset[:, None] + np.cumsum(constrained, axis=1) - 1)[constrained]
+        number_equations = number_free_equations + int(constrained_count.sum())
+
+        element_equations = np.empty((self.number_of_elements, 6), dtype=np.int64)
+        for j in range(2):
+            nodes = self.connectivity[:, j]
+            element_equations[:, 3*j:3*j+3] = node_equations[nodes]
+
+            extra = self.hinges[nodes] & (slots[:, j] > 0)
+            element_equations[extra, 3*j+2] = first_hinge_equation[nodes[extra]] + slots[extra, j] - 1
+
+        return node_equations, element_equations, number_equations, number_free_equations
+
+    def nbytes(self)->int:
+        """
+        Returns the memory (in bytes) held by the model arrays
+        """
+        arrays = [self.coordinates, self.supports, self.connectivity, self.sections, self.materials,
+                  self.section_ids, self.material_ids, self.hinges, self.loads, self.springs,
+                  self.displacements, self.node_index, self.element_index, *self.case_loads.values()]
+        return sum(a.nbytes for a in arrays)
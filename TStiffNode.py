@@ -5,6 +5,7 @@ import numpy as np
 from typing import ClassVar
 from tpanic import DebugStop
 from dataclasses import dataclass, field
+from TStiffRegistry import TStiffRegistry
 
 @dataclass
 class TStiffNode:
@@ -24,24 +25,27 @@ class TStiffNode:
         - DoF: node Degrees of Freedom
         - springs: list contaning informations about nodal prescribed springs. 
         - displacement: list containing information about nodal prescribed displacement. 
+        - registry: TStiffRegistry allocating the node index and storing its
+          connections (default: 'default_registry', shared by the nodes built without one)
     """
 #%% --------------------------
 #       INITIALIZER
 # ----------------------------
-    counter: ClassVar[int] = 0
+    default_registry: ClassVar[TStiffRegistry] = TStiffRegistry()
 
     _coordinates: list
     _support_type: str = "Free"
+    _registry: TStiffRegistry = field(default=None, repr=False, compare=False)
     _index: int = field(init=False)
     _hinge: bool = field(init=False, default=False)
-    _number_of_connections: int = field(init=False, default=0)
-    _connects: list = field(init=False, default_factory=list)
     _DoF: list[int] = field(init=False, default_factory=list)
     _springs: list[tuple[str, float]] = field(init=False, default_factory=list)
     _nodal_displacement: list[tuple[str, float]] = field(init=False, default_factory=list)
 
     def __post_init__(self):
         self._coordinates = np.array(self._coordinates)
+        if self._registry is None:
+            self._registry = TStiffNode.default_registry
         self.node_index()
         self._DoF = [np.nan for _ in range(3)]
  
@@ -84,25 +88,19 @@ class TStiffNode:
     def index(self, i): self._index = i
 
     @property
-    def connects(self): return self._connects
-    @connects.setter
-    def connects(self, c): self._connects = c
+    def registry(self): return self._registry
 
     @property
-    def number_of_connections(self): return self._number_of_connections
-    @number_of_connections.setter
-    def number_of_connections(self, n): self._number_of_connections = n
+    def connects(self): return self._registry.connects(self.index)
+
+    @property
+    def number_of_connections(self): return self._registry.number_of_connections(self.index)
 
 #%% --------------------------
 #       CLASS METHODS
 # ----------------------------
-    @classmethod
-    def increment_counter(cls):
-        cls.counter += 1
-        
     def node_index(self):
-        self.index = self.counter
-        TStiffNode.increment_counter()
+        self.index = self._registry.new_node()
 
     def is_hinge(self):
         self.hinge = True
@@ -0,0 +1,119 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import numpy as np
+from dataclasses import dataclass, field
+
+@dataclass
+class TStiffOperator:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Matrix-free representation of the free stiffness matrix K00. The product
+    K00 @ u is applied element by element from the batched stiffness stack,
+    so 'KG' is never assembled.
+
+    Provide:
+        - 'element_stiffness': (n_elem, 6, 6) element global stiffness matrices
+        - 'element_equations': (n_elem, 6) equations of each element
+        - 'size': number of free equations
+        - 'spring_equations', 'spring_values': prescribed springs (diagonal terms)
+        - 'chunk': number of elements processed at once
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _element_stiffness: np.ndarray
+    _element_equations: np.ndarray
+    _size: int
+    _spring_equations: np.ndarray = None
+    _spring_values: np.ndarray = None
+    _chunk: int = 65536
+    _free_equations: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # constrained equations are sent to a dummy position 'size' which is discarded
+        self._free_equations = np.where(self._element_equations < self._size, self._element_equations, self._size)
+
+        if self._spring_equations is None:
+            self._spring_equations = np.zeros(0, dtype=np.int64)
+            self._spring_values = np.zeros(0)
+
+        self._spring_equations = np.asarray(self._spring_equations, dtype=np.int64)
+        self._spring_values = np.asarray(self._spring_values, dtype=float)
+
+        free = self._spring_equations < self._size
+        self._spring_equations = self._spring_equations[free]
+        self._spring_values = self._spring_values[free]
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def element_stiffness(self): return self._element_stiffness
+    @element_stiffness.setter
+    def element_stiffness(self, kel): self._element_stiffness = kel
+
+    @property
+    def element_equations(self): return self._element_equations
+
+    @property
+    def size(self): return self._size
+
+    @property
+    def chunk(self): return self._chunk
+    @chunk.setter
+    def chunk(self, n): self._chunk = n
+
+    @property
+    def shape(self): return (self.size, self.size)
+
+    @property
+    def dtype(self): return np.dtype(float)
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def matvec(self, u:np.ndarray)->np.ndarray:
+        """
+        Returns K00 @ 'u' without assembling K00
+        """
+        u = np.append(np.asarray(u, dtype=float).ravel(), 0.0)
+        y = np.zeros(self.size + 1)
+
+        for start in range(0, self.element_equations.shape[0], self.chunk):
+            equations = self._free_equations[start:start + self.chunk]
+            ye = np.einsum("eij,ej->ei", self.element_stiffness[start:start + self.chunk], u[equations])
+            y += np.bincount(equations.ravel(), weights=ye.ravel(), minlength=self.size + 1)
+
+        np.add.at(y, self._spring_equations, self._spring_values*u[self._spring_equations])
+        return y[:self.size]
+
+    def __matmul__(self, u:np.ndarray)->np.ndarray:
+        return self.matvec(u)
+
+    def diagonal(self)->np.ndarray:
+        """
+        Returns the diagonal of K00
+        """
+        diagonal = np.bincount(self._free_equations.ravel(),
+                               weights=np.diagonal(self.element_stiffness, axis1=1, axis2=2).ravel(),
+                               minlength=self.size + 1)[:self.size]
+        np.add.at(diagonal, self._spring_equations, self._spring_values)
+        return diagonal
+
+    def triplets(self):
+        """
+        Yields the (rows, cols, values) free-free stiffness terms chunk by chunk
+        """
+        for start in range(0, self.element_equations.shape[0], self.chunk):
+            equations = self.element_equations[start:start + self.chunk]
+            rows = np.repeat(equations, 6, axis=1).ravel()
+            cols = np.tile(equations, (1, 6)).ravel()
+            values = self.element_stiffness[start:start + self.chunk].ravel()
+
+            free = (rows < self.size) & (cols < self.size)
+            yield rows[free], cols[free], values[free]
+
+        yield self._spring_equations, self._spring_equations, self._spring_values
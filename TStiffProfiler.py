@@ -0,0 +1,166 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable
+
+@dataclass
+class TStiffProfiler:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Collects per-phase timings and counters of a TStiffAnalysis. Pass it as
+    '_profiler' and every phase of the analysis (setup, Run, Reanalyse and
+    Export) is measured. Nested phases are named 'outer/inner'.
+
+    Provide:
+        - 'callbacks': functions called with every record (a dictionary)
+        - 'log': path of a JSON lines file where every record is appended
+        - 'memory': also records the peak traced memory (tracemalloc) of each phase
+        - 'tags': fields added to every record (e.g. {"job": "frame-12"})
+
+    Records:
+        - {"event": "phase", "name", "wall", "cpu", "memory"}: wall-clock and CPU
+          seconds of a phase and its peak traced memory in bytes (None if not traced)
+        - {"event": "counters", ...}: sizes of the analysed system
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _callbacks: list[Callable[[dict], None]] = field(default_factory=list)
+    _log: str = None
+    _memory: bool = False
+    _tags: dict = field(default_factory=dict)
+    _records: list[dict] = field(init=False, default_factory=list)
+    _stack: list[dict] = field(init=False, repr=False, default_factory=list)
+    _tracing: bool = field(init=False, repr=False, default=False)
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def callbacks(self): return self._callbacks
+    @callbacks.setter
+    def callbacks(self, callbacks): self._callbacks = callbacks
+
+    @property
+    def log(self): return self._log
+    @log.setter
+    def log(self, file): self._log = file
+
+    @property
+    def memory(self): return self._memory
+    @memory.setter
+    def memory(self, is_traced): self._memory = is_traced
+
+    @property
+    def tags(self): return self._tags
+    @tags.setter
+    def tags(self, tags): self._tags = tags
+
+    @property
+    def records(self): return self._records
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def emit(self, record:dict)->None:
+        """
+        Stores 'record' and sends it to the callbacks and the log file
+        """
+        record = {**self.tags, **record}
+        self.records.append(record)
+
+        for callback in self.callbacks:
+            callback(record)
+
+        if self.log is not None:
+            with open(self.log, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def flush_peak(self)->None:
+        """
+        Passes the traced memory peak to every open phase and resets it,
+        so nested phases keep their own peaks
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        for frame in self._stack:
+            frame["peak"] = max(frame["peak"], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def phase(self, name:str):
+        """
+        Measures the block run inside 'with profiler.phase(name):'
+        """
+        traced = self.memory
+        if traced and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        if traced:
+            self.flush_peak()
+
+        current = tracemalloc.get_traced_memory()[0] if traced else 0
+        frame = {"name": "/".join([f["name"] for f in self._stack] + [name]), "start": current, "peak": current}
+        self._stack.append(frame)
+
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield frame
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if traced:
+                self.flush_peak()
+            self._stack.pop()
+
+            self.emit({"event": "phase", "name": frame["name"], "wall": wall, "cpu": cpu,
+                       "memory": frame["peak"] - frame["start"] if traced else None})
+
+    def close(self)->None:
+        """
+        Stops tracemalloc if this profiler started it
+        """
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def count(self, **counters)->None:
+        """
+        Records the counters given as keyword arguments
+        """
+        self.emit({"event": "counters", **counters})
+
+    def summary(self)->dict[str, dict[str, float]]:
+        """
+        Returns the total wall/CPU time, largest traced memory and number
+        of calls of each phase
+        """
+        phases = {}
+        for record in self.records:
+            if record["event"] != "phase":
+                continue
+
+            total = phases.setdefault(record["name"], {"wall": 0.0, "cpu": 0.0, "memory": None, "calls": 0})
+            total["wall"] += record["wall"]
+            total["cpu"] += record["cpu"]
+            total["calls"] += 1
+            if record["memory"] is not None:
+                total["memory"] = max(total["memory"] or 0, record["memory"])
+
+        return phases
+
+    def report(self)->str:
+        """
+        Returns the phase summary as a table
+        """
+        lines = [f"{'phase':<28}{'calls':>6}{'wall [s]':>12}{'cpu [s]':>12}{'memory [MB]':>14}"]
+        for name, total in self.summary().items():
+            memory = f"{total['memory']/2**20:14.3f}" if total["memory"] is not None else f"{'-':>14}"
+            lines.append(f"{name:<28}{total['calls']:>6}{total['wall']:12.4e}{total['cpu']:12.4e}{memory}")
+
+        return "\n".join(lines)
@@ -0,0 +1,82 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import threading
+from dataclasses import dataclass, field
+
+@dataclass
+class TStiffRegistry:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Index allocation and connectivity of one structure. Every TStiffNode and
+    TStiffElement takes its index from the registry of its model, and the
+    elements connected to a node are stored here instead of on the node, so
+    independent structures can be built and analysed at the same time (e.g.
+    from a thread pool) without sharing any counter.
+
+    Nodes use TStiffNode.default_registry when no 'registry' is given, and
+    elements use the registry of their nodes.
+
+    Computed:
+        - 'number_of_nodes', 'number_of_elements': indices allocated so far
+        - 'connects': {node index: [(connection, element index), ...]}
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _number_of_nodes: int = field(init=False, default=0)
+    _number_of_elements: int = field(init=False, default=0)
+    _connects: dict[int, list[tuple[int, int]]] = field(init=False, repr=False, default_factory=dict)
+    _lock: threading.Lock = field(init=False, repr=False, compare=False, default_factory=threading.Lock)
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def number_of_nodes(self): return self._number_of_nodes
+
+    @property
+    def number_of_elements(self): return self._number_of_elements
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def new_node(self)->int:
+        """
+        Allocates the index of a new node
+        """
+        with self._lock:
+            index = self._number_of_nodes
+            self._number_of_nodes += 1
+            return index
+
+    def new_element(self)->int:
+        """
+        Allocates the index of a new element
+        """
+        with self._lock:
+            index = self._number_of_elements
+            self._number_of_elements += 1
+            return index
+
+    def connect(self, node:int, element:int)->None:
+        """
+        Connects the element 'element' to the node 'node' (indices)
+        """
+        with self._lock:
+            connects = self._connects.setdefault(node, [])
+            connects.append((len(connects), element))
+
+    def connects(self, node:int)->list[tuple[int, int]]:
+        """
+        Returns the (connection, element index) pairs of the node 'node'
+        """
+        return self._connects.get(node, [])
+
+    def number_of_connections(self, node:int)->int:
+        """
+        Returns the number of elements connected to the node 'node'
+        """
+        return len(self._connects.get(node, []))
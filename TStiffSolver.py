@@ -0,0 +1,461 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import time
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu, spilu
+from tpanic import DebugStop
+from TStiffOperator import TStiffOperator
+from dataclasses import dataclass, field
+
+@dataclass
+class TStiffSolver:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Solves the free system K00 u0 = F0 by factorizing K00 once and
+    keeping the factor, so later right hand sides reuse it.
+
+    Currently available for 'method':
+        - 'auto': dense Cholesky for small or dense systems, sparse LU otherwise
+        - 'cholesky': dense Cholesky factorization (SPD systems)
+        - 'ldlt': dense LDLt factorization (symmetric indefinite systems)
+        - 'banded': banded Cholesky factorization, its cost grows with the bandwidth
+          (pair it with a bandwidth reducing renumbering, TStiffAnalysis 'reorder')
+        - 'sparse_lu': sparse direct LU factorization (SuperLU)
+        - 'inverse': explicit inverse, kept for comparison only
+        - 'pcg': preconditioned conjugate gradient, the only method accepting a 
+          matrix-free TStiffOperator
+
+    Currently available for 'preconditioner' ('pcg' only):
+        - 'none': plain conjugate gradient
+        - 'jacobi': inverse of the diagonal
+        - 'block_jacobi': inverse of the nodal diagonal blocks, grouped by 'blocks'
+        - 'ichol': incomplete factorization (threshold ILU, needs an assembled K00)
+
+    Fields:
+        - 'dense_limit': largest number of equations solved densely by 'auto'
+        - 'density_limit': smallest fill ratio for which 'auto' stays dense
+        - 'ordering': column ordering of the sparse LU ('NATURAL' keeps the equation numbering)
+        - 'tolerance': relative residual at which 'pcg' stops
+        - 'max_iterations': largest number of 'pcg' iterations (default: 10 x number of equations)
+        - 'drop_tolerance': drop tolerance of the 'ichol' preconditioner
+        - 'blocks': (n,) label of each equation for 'block_jacobi' (default: groups of 3)
+        - 'backend': factorization actually used
+        - 'stats': time (s) and memory (bytes) of the last factorization and solve,
+          plus iterations and relative residual history of 'pcg'
+
+    'refactorize' factorizes a matrix with the sparsity pattern of the last
+    one (e.g. the tangent stiffness of an iteration): the sparse LU keeps its
+    fill-reducing ordering and only repeats the numeric factorization.
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _method: str = "auto"
+    _dense_limit: int = 2000
+    _density_limit: float = 0.1
+    _ordering: str = "MMD_AT_PLUS_A"
+    _preconditioner: str = "jacobi"
+    _tolerance: float = 1e-10
+    _max_iterations: int = None
+    _drop_tolerance: float = 1e-4
+    _blocks: np.ndarray = field(default=None, repr=False)
+    _backend: str = field(init=False, default=None)
+    _factor: object = field(init=False, default=None, repr=False)
+    _permutation: np.ndarray = field(init=False, default=None, repr=False)
+    _stats: dict = field(init=False, default_factory=dict)
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def method(self): return self._method
+    @method.setter
+    def method(self, method): self._method = method
+
+    @property
+    def dense_limit(self): return self._dense_limit
+    @dense_limit.setter
+    def dense_limit(self, n): self._dense_limit = n
+
+    @property
+    def density_limit(self): return self._density_limit
+    @density_limit.setter
+    def density_limit(self, ratio): self._density_limit = ratio
+
+    @property
+    def ordering(self): return self._ordering
+    @ordering.setter
+    def ordering(self, ordering): self._ordering = ordering
+
+    @property
+    def preconditioner(self): return self._preconditioner
+    @preconditioner.setter
+    def preconditioner(self, preconditioner): self._preconditioner = preconditioner
+
+    @property
+    def tolerance(self): return self._tolerance
+    @tolerance.setter
+    def tolerance(self, tol): self._tolerance = tol
+
+    @property
+    def max_iterations(self): return self._max_iterations
+    @max_iterations.setter
+    def max_iterations(self, n): self._max_iterations = n
+
+    @property
+    def drop_tolerance(self): return self._drop_tolerance
+    @drop_tolerance.setter
+    def drop_tolerance(self, tol): self._drop_tolerance = tol
+
+    @property
+    def blocks(self): return self._blocks
+    @blocks.setter
+    def blocks(self, labels): self._blocks = labels
+
+    @property
+    def backend(self): return self._backend
+    @backend.setter
+    def backend(self, backend): self._backend = backend
+
+    @property
+    def factor(self): return self._factor
+    @factor.setter
+    def factor(self, factor): self._factor = factor
+
+    @property
+    def stats(self): return self._stats
+    @stats.setter
+    def stats(self, stats): self._stats = stats
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def choose_backend(self, K)->str:
+        """
+        Picks the factorization used by the 'auto' method based on
+        the system size and sparsity
+        """
+        n = K.shape[0]
+        if isinstance(K, TStiffOperator):
+            return "pcg"
+
+        if sp.issparse(K):
+            density = K.nnz/max(n*n, 1)
+            if n <= self.dense_limit and density >= self.density_limit:
+                return "cholesky"
+            return "sparse_lu"
+
+        return "cholesky" if n <= self.dense_limit else "sparse_lu"
+
+    def factorize(self, K)->None:
+        """
+        Factorizes the matrix 'K' (dense or sparse) and stores the factor
+        """
+        self.backend = self.choose_backend(K) if self.method == "auto" else self.method
+        start = time.perf_counter()
+
+        if isinstance(K, TStiffOperator) and self.backend != "pcg":
+            print(f"ERROR: a matrix-free operator can only be solved by 'pcg' ({self.backend})")
+            DebugStop()
+
+        if self.backend in ("cholesky", "ldlt", "inverse"):
+            K = K.toarray() if sp.issparse(K) else np.asarray(K)
+
+        if self.backend == "cholesky":
+            try:
+                self.factor = la.cho_factor(K, lower=True, check_finite=False)
+            except la.LinAlgError:
+                if self.method == "cholesky":
+                    print("ERROR: matrix is not positive definite, Cholesky factorization failed")
+                    DebugStop()
+                self.backend = "ldlt"
+
+        if self.backend == "ldlt":
+            lu, d, perm = la.ldl(K, lower=True, check_finite=False)
+            self.factor = (lu[perm], d, perm)
+
+        elif self.backend == "banded":
+            self.factor = la.cholesky_banded(self.upper_bands(K), lower=False, check_finite=False)
+
+        elif self.backend == "sparse_lu":
+            K = sp.csc_matrix(K)
+            self._permutation = None
+            self.factor = splu(K, permc_spec=self.ordering, diag_pivot_thresh=0.0,
+                               options={"SymmetricMode": True})
+
+        elif self.backend == "inverse":
+            self.factor = np.linalg.inv(K)
+
+        elif self.backend == "pcg":
+            K = K if isinstance(K, TStiffOperator) else sp.csr_matrix(K)
+            self.factor = (K, self.build_preconditioner(K))
+
+        elif self.backend != "cholesky":
+            print(f"ERROR: solver method not defined ({self.backend})")
+            DebugStop()
+
+        self.stats = {"backend": self.backend,
+                      "equations": K.shape[0],
+                      "factorize_time": time.perf_counter() - start,
+                      "solve_time": 0.0,
+                      "factor_memory": self.factor_memory()}
+
+        if self.backend == "pcg":
+            self.stats.update({"preconditioner": self.preconditioner, "iterations": [], 
+                               "residuals": [], "converged": True})
+
+    def refactorize(self, K)->None:
+        """
+        Factorizes 'K', which keeps the sparsity pattern of the last factorized
+        matrix. The sparse LU reuses the stored column ordering (the system is
+        permuted symmetrically and factorized in 'NATURAL' order); the other
+        backends are factorized again
+        """
+        if self.factor is None or self.backend != "sparse_lu":
+            self.factorize(K)
+            return
+
+        start = time.perf_counter()
+        if self._permutation is None:
+            self._permutation = np.argsort(self.factor.perm_c)
+
+        p = self._permutation
+        K = sp.csc_matrix(K)[p][:, p]
+        self.factor = splu(sp.csc_matrix(K), permc_spec="NATURAL", diag_pivot_thresh=0.0,
+                           options={"SymmetricMode": True})
+
+        self.stats.update({"factorize_time": time.perf_counter() - start, "solve_time": 0.0,
+                           "factor_memory": self.factor_memory(), "reused_ordering": True})
+
+    def build_preconditioner(self, K):
+        """
+        Builds the 'pcg' preconditioner of 'K' (matrix or TStiffOperator).
+        Returns a function applying it to a residual and the data it holds
+        """
+        if self.preconditioner == "none":
+            return (lambda r: r), np.zeros(0)
+
+        elif self.preconditioner == "jacobi":
+            inverse = 1.0/K.diagonal()
+            return (lambda r: inverse*r), inverse
+
+        elif self.preconditioner == "block_jacobi":
+            index, inverse = self.block_inverses(K)
+            def apply(r):
+                z = np.einsum("bij,bj->bi", inverse, np.append(r, 0.0)[index])
+                return np.bincount(index.ravel(), weights=z.ravel(), minlength=r.size + 1)[:r.size]
+            return apply, inverse
+
+        elif self.preconditioner == "ichol":
+            if isinstance(K, TStiffOperator):
+                print("ERROR: the 'ichol' preconditioner needs an assembled K00")
+                DebugStop()
+            ilu = spilu(sp.csc_matrix(K), drop_tol=self.drop_tolerance, 
+                        options={"SymmetricMode": True}, permc_spec=self.ordering)
+            return ilu.solve, ilu
+
+        print(f"ERROR: preconditioner not defined ({self.preconditioner})")
+        DebugStop()
+
+    def block_inverses(self, K)->tuple[np.ndarray, np.ndarray]:
+        """
+        Extracts and inverts the diagonal blocks of 'K' grouped by 'blocks'.
+        Returns the (n_blocks, s) equations of each block, padded with the
+        dummy equation n, and the (n_blocks, s, s) inverse blocks
+        """
+        n = K.shape[0]
+        labels = np.arange(n)//3 if self.blocks is None else np.asarray(self.blocks)[:n]
+
+        _, block, size = np.unique(labels, return_inverse=True, return_counts=True)
+        order = np.argsort(block, kind="stable")
+        local = np.empty(n, dtype=np.int64)
+        local[order] = np.arange(n) - (np.cumsum(size) - size)[block[order]]
+
+        s = int(size.max()) if n else 1
+        index = np.full((size.size, s), n, dtype=np.int64)
+        index[block, local] = np.arange(n)
+
+        blocks = np.zeros((size.size, s, s))
+        triplets = K.triplets() if isinstance(K, TStiffOperator) else [self.coo_triplets(K)]
+        for rows, cols, values in triplets:
+            same = block[rows] == block[cols]
+            np.add.at(blocks, (block[rows[same]], local[rows[same]], local[cols[same]]), values[same])
+
+        padding = np.arange(s)[None, :] >= size[:, None]
+        blocks[:, np.arange(s), np.arange(s)] += padding
+
+        return index, np.linalg.inv(blocks)
+
+    @staticmethod
+    def coo_triplets(K)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the (rows, cols, values) terms of the matrix 'K'
+        """
+        K = sp.coo_matrix(K)
+        return K.row, K.col, K.data
+
+    def pcg(self, b:np.ndarray)->np.ndarray:
+        """
+        Solves K u = 'b' by preconditioned conjugate gradient, recording
+        the iterations and relative residual history in 'stats'
+        """
+        K, (precondition, _) = self.factor
+        max_iterations = self.max_iterations or 10*b.size
+
+        u = np.zeros_like(b)
+        r = b.copy()
+        z = precondition(r)
+        p = z.copy()
+        rz = r@z
+        norm_b = np.linalg.norm(b) or 1.0
+        residuals = [np.linalg.norm(r)/norm_b]
+
+        while residuals[-1] > self.tolerance and len(residuals) <= max_iterations:
+            Kp = K@p
+            alpha = rz/(p@Kp)
+            u += alpha*p
+            r -= alpha*Kp
+            residuals.append(np.linalg.norm(r)/norm_b)
+
+            z = precondition(r)
+            rz, rz_old = r@z, rz
+            p = z + (rz/rz_old)*p
+
+        self.stats["iterations"].append(len(residuals) - 1)
+        self.stats["residuals"].append(residuals)
+        self.stats["converged"] &= bool(residuals[-1] <= self.tolerance)
+        return u
+
+    def solve(self, F:np.ndarray)->np.ndarray:
+        """
+        Solves K u = 'F' with the stored factor. 'F' may hold one right
+        hand side per column
+        """
+        if self.factor is None:
+            print("ERROR: the system must be factorized before solving it")
+            DebugStop()
+
+        start = time.perf_counter()
+        F = np.asarray(F, dtype=float)
+
+        if self.backend == "cholesky":
+            u = la.cho_solve(self.factor, F, check_finite=False)
+
+        elif self.backend == "ldlt":
+            L, d, perm = self.factor
+            z = la.solve_triangular(L, F[perm], lower=True, unit_diagonal=True, check_finite=False)
+            w = la.solve_banded((1, 1), self.tridiagonal_bands(d), z, check_finite=False)
+            y = la.solve_triangular(L.T, w, lower=False, unit_diagonal=True, check_finite=False)
+            u = np.empty_like(y)
+            u[perm] = y
+
+        elif self.backend == "banded":
+            u = la.cho_solve_banded((self.factor, False), F, check_finite=False)
+
+        elif self.backend == "sparse_lu" and self._permutation is not None:
+            u = np.empty_like(F)
+            u[self._permutation] = self.factor.solve(F[self._permutation])
+
+        elif self.backend == "sparse_lu":
+            u = self.factor.solve(F)
+
+        elif self.backend == "pcg":
+            u = np.empty_like(F)
+            for j in np.ndindex(F.shape[1:]):
+                column = (slice(None),) + j
+                u[column] = self.pcg(F[column])
+
+        else:
+            u = self.factor@F
+
+        self.stats["solve_time"] += time.perf_counter() - start
+        return u
+
+    @staticmethod
+    def upper_bands(K)->np.ndarray:
+        """
+        Stores the upper triangle of the symmetric matrix 'K' in the
+        banded format of 'cholesky_banded'
+        """
+        K = sp.coo_matrix(sp.csr_matrix(K))
+        upper = K.row <= K.col
+        rows, cols, values = K.row[upper], K.col[upper], K.data[upper]
+
+        bandwidth = int((cols - rows).max()) if values.size else 0
+        bands = np.zeros((bandwidth + 1, K.shape[0]))
+        bands[bandwidth + rows - cols, cols] = values
+        return bands
+
+    @staticmethod
+    def tridiagonal_bands(d:np.ndarray)->np.ndarray:
+        """
+        Stores the block diagonal 'd' of a LDLt factorization
+        (1x1 and 2x2 blocks) in the banded format of 'solve_banded'
+        """
+        n = d.shape[0]
+        bands = np.zeros((3, n))
+        bands[0, 1:] = np.diagonal(d, 1)
+        bands[1] = np.diagonal(d)
+        bands[2, :-1] = np.diagonal(d, -1)
+        return bands
+
+    def factor_memory(self)->int:
+        """
+        Returns the memory (in bytes) held by the stored factor
+        """
+        if self.backend == "cholesky":
+            return self.factor[0].nbytes
+
+        elif self.backend == "ldlt":
+            return self.factor[0].nbytes + self.factor[1].nbytes + self.factor[2].nbytes
+
+        elif self.backend == "banded":
+            return self.factor.nbytes
+
+        elif self.backend == "sparse_lu":
+            L, U = self.factor.L, self.factor.U
+            return sum(a.nbytes for a in (L.data, L.indices, L.indptr, U.data, U.indices, U.indptr))
+
+        elif self.backend == "pcg":
+            data = self.factor[1][1]
+            if isinstance(data, np.ndarray):
+                return data.nbytes
+            L, U = data.L, data.U
+            return sum(a.nbytes for a in (L.data, L.indices, L.indptr, U.data, U.indices, U.indptr))
+
+        return self.factor.nbytes
+
+    def report(self)->str:
+        """
+        Returns a one line summary of the last factorization and solve
+        """
+        s = self.stats
+        report = (f"{s['backend']}: {s['equations']} equations, factorization {s['factorize_time']:.3e} s, "
+                  f"solve {s['solve_time']:.3e} s, factor memory {s['factor_memory']/1024**2:.3f} MB")
+
+        if self.backend == "pcg" and s["iterations"]:
+            report += (f", {s['preconditioner']} preconditioner, {max(s['iterations'])} iterations, "
+                       f"residual {max(r[-1] for r in s['residuals']):.2e}")
+        return report
+
+    @classmethod
+    def compare_backends(cls, K, F:np.ndarray, methods:list[str] = None)->dict[str, dict]:
+        """
+        Factorizes and solves 'K' u = 'F' with each method in 'methods',
+        returning the time and memory statistics of every backend
+        """
+        methods = methods or ["cholesky", "ldlt", "banded", "sparse_lu", "inverse"]
+        results = {}
+
+        for method in methods:
+            solver = cls(_method=method)
+            solver.factorize(K)
+            solver.solve(F)
+            results[method] = dict(solver.stats)
+
+        return results
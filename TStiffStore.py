@@ -0,0 +1,152 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import os
+import json
+import numpy as np
+from dataclasses import dataclass, field
+from typing import ClassVar
+from tpanic import DebugStop
+
+@dataclass
+class TStiffStore:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Binary columnar store of analysis results, written next to (or instead
+    of) the text report of TStiffAnalysis.Results. A store is a directory with:
+        - 'manifest.json': sizes, load cases and the shape/dtype of every array
+        - 'UG.npy', 'FG.npy': global displacement and load vectors
+        - 'uel.npy', 'solution.npy', 'fel.npy': element stacks, (n_elem, 6) or
+          (n_cases, n_elem, 6) when load cases exist
+        - 'equations.npy': (n_elem, 6) DoF map of each element
+        - 'index.npz': element and node indices and the (n_nodes, 3) node DoF map
+
+    The .npy files are opened memory-mapped, so reading a few elements
+    does not load the whole file.
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    version: ClassVar[int] = 1
+
+    _directory: str
+    _manifest: dict = field(init=False, default=None)
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def directory(self): return self._directory
+    @directory.setter
+    def directory(self, directory): self._directory = directory
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            with open(os.path.join(self.directory, "manifest.json")) as f:
+                self._manifest = json.load(f)
+        return self._manifest
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def save(self, analysis)->None:
+        """
+        Writes the results of a TStiffAnalysis that has been 'Run'
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        arrays = {"UG": analysis.UG, "FG": analysis.FG, "equations": analysis.element_equations}
+        arrays.update(self.element_stacks(analysis))
+
+        files = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            np.save(os.path.join(self.directory, f"{name}.npy"), array)
+            files[name] = {"file": f"{name}.npy", "shape": list(array.shape), "dtype": str(array.dtype)}
+
+        element_index, node_index, node_equations = self.index_arrays(analysis)
+        np.savez(os.path.join(self.directory, "index.npz"), element_index=element_index,
+                 node_index=node_index, node_equations=node_equations)
+
+        self._manifest = {"version": self.version,
+                          "number_equations": int(analysis.number_equations),
+                          "number_free_equations": int(analysis.number_free_equations),
+                          "number_elements": int(element_index.size),
+                          "number_nodes": int(node_index.size),
+                          "case_names": analysis.case_names if analysis.load_cases else [],
+                          "arrays": files,
+                          "index": "index.npz"}
+
+        with open(os.path.join(self.directory, "manifest.json"), "w") as f:
+            json.dump(self.manifest, f, indent=2)
+
+    @staticmethod
+    def element_stacks(analysis)->dict[str, np.ndarray]:
+        """
+        Returns the element displacement, reaction force and load stacks
+        """
+        loads = analysis.load_stack()
+        if analysis.load_cases:
+            loads = np.moveaxis(loads, -1, 0)
+        return {"uel": analysis.element_displacements, "solution": analysis.element_solutions, "fel": loads}
+
+    @staticmethod
+    def index_arrays(analysis)->tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the element indices, node indices and (n_nodes, 3) node DoF map
+        """
+        if analysis.model is not None:
+            return analysis.model.element_index, analysis.model.node_index, analysis.node_equations
+
+        element_index = np.array([e.index for e in analysis.elements], dtype=np.int64)
+        node_index = np.array([node.index for node in analysis.nodes_list], dtype=np.int64)
+        node_equations = np.array([[-1 if np.isnan(dof) else dof for dof in node.DoF[:3]]
+                                   for node in analysis.nodes_list], dtype=np.int64).reshape(-1, 3)
+        return element_index, node_index, node_equations
+
+    def load(self, name:str, mmap:bool = True)->np.ndarray:
+        """
+        Opens the stored array 'name', memory-mapped by default
+        """
+        if name not in self.manifest["arrays"]:
+            print(f"ERROR: array not stored ({name})")
+            DebugStop()
+
+        path = os.path.join(self.directory, self.manifest["arrays"][name]["file"])
+        return np.load(path, mmap_mode="r" if mmap else None)
+
+    def index(self)->dict[str, np.ndarray]:
+        """
+        Loads the element/node indices and the node DoF map
+        """
+        with np.load(os.path.join(self.directory, self.manifest["index"])) as data:
+            return {key: data[key] for key in data.files}
+
+    def element_results(self, name:str, positions, case:str = None)->np.ndarray:
+        """
+        Reads the rows of the element stack 'name' ('uel', 'solution', 'fel'
+        or 'equations') for the elements at 'positions', optionally for
+        a single load 'case', without reading the rest of the file
+        """
+        array = self.load(name)
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.int64))
+
+        if array.ndim == 3:
+            cases = self.manifest["case_names"]
+            if case is not None:
+                return np.array(array[cases.index(case)][positions])
+            return np.array(array[:, positions])
+
+        return np.array(array[positions])
+
+    def element_positions(self, element_index)->np.ndarray:
+        """
+        Maps TStiffElement (or model) indices to positions in the stacks
+        """
+        stored = self.index()["element_index"]
+        order = np.argsort(stored)
+        wanted = np.atleast_1d(element_index)
+        return order[np.searchsorted(stored, wanted, sorter=order)]
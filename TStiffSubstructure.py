@@ -0,0 +1,280 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import cho_factor, cho_solve
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from tpanic import DebugStop
+from TStiffModel import TStiffModel
+from TStiffAnalysis import TStiffAnalysis
+from TStiffSolver import TStiffSolver
+from TStiffElement import TStiffElement
+from TStiffCache import TStiffCache
+
+@dataclass
+class TStiffSubstructure:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Substructure analysis: each group of elements is condensed to its
+    boundary equations (Schur complement) and becomes a super-element of the
+    global system. After the global solve the interior displacements are
+    recovered as u_i = K_ii^-1 (F_i - K_ib u_b).
+
+    Provide:
+        - 'model': structure (TStiffModel, or a list of TStiffElement)
+        - 'groups': substructures, lists of TStiffElement or of element positions.
+          Elements outside every group are assembled directly
+        - 'workers': number of worker processes condensing the substructures
+          (0 or 1 condenses in this process)
+        - 'solver': TStiffSolver of the condensed global system
+
+    A free equation is on the boundary of a group when an element outside the
+    group uses it or when it has a spring; the others are interior. Groups with
+    the same element stiffness, loads and equation pattern (e.g. repeated
+    storeys) are condensed once.
+
+    Results ('UG', 'element_displacements', 'element_solutions', 'reactions')
+    follow the TStiffAnalysis of the model.
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _model: TStiffModel
+    _groups: list[list]
+    _workers: int = 0
+    _solver: TStiffSolver = field(default_factory=TStiffSolver)
+    _analysis: TStiffAnalysis = field(init=False, repr=False)
+    _super_elements: list[dict] = field(init=False, repr=False, default_factory=list)
+    _condensed: list[tuple] = field(init=False, repr=False, default_factory=list)
+
+    def __post_init__(self):
+        if not isinstance(self._model, TStiffModel):
+            self._model = TStiffModel.from_elements(self._model)
+
+        position = {index: i for i, index in enumerate(self._model.element_index.tolist())}
+        self._groups = [np.array([position[e.index] if isinstance(e, TStiffElement) else int(e) for e in group], 
+                                 dtype=np.int64) for group in self._groups]
+
+        self._analysis = TStiffAnalysis(_model=self._model, _sparse=True)
+        self.analysis.check_for_prescribed_displacements()
+        self.analysis.calc_element_stiffness()
+        self.partition()
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def model(self): return self._model
+    @model.setter
+    def model(self, model): self._model = model
+
+    @property
+    def groups(self): return self._groups
+    @groups.setter
+    def groups(self, groups): self._groups = groups
+
+    @property
+    def workers(self): return self._workers
+    @workers.setter
+    def workers(self, n): self._workers = n
+
+    @property
+    def solver(self): return self._solver
+    @solver.setter
+    def solver(self, solver): self._solver = solver
+
+    @property
+    def analysis(self): return self._analysis
+
+    @property
+    def super_elements(self): return self._super_elements
+
+    @property
+    def UG(self): return self.analysis.UG
+
+    @property
+    def element_displacements(self): return self.analysis.element_displacements
+
+    @property
+    def element_solutions(self): return self.analysis.element_solutions
+
+    @property
+    def reactions(self): return self.analysis.reactions
+
+    @property
+    def number_of_condensations(self): return len(self._condensed)
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def element_loads(self)->np.ndarray:
+        """
+        Returns the element load stack minus the element forces of the
+        prescribed displacements (the -K01 u1 term of the free equations)
+        """
+        return self.analysis.model_load_stack() - self.analysis.prescribed_element_forces()
+
+    def partition(self)->None:
+        """
+        Splits the equations of each group into boundary and interior ones
+        and finds the groups sharing one condensation
+        """
+        analysis = self.analysis
+        n = analysis.number_free_equations
+        equations = analysis.element_equations
+
+        grouped = np.concatenate(self.groups) if self.groups else np.zeros(0, dtype=np.int64)
+        if np.unique(grouped).size != grouped.size:
+            print("ERROR: an element belongs to more than one substructure")
+            DebugStop()
+
+        use = np.bincount(equations.ravel(), minlength=analysis.number_equations)
+        spring_dofs, _ = analysis.spring_equations()
+        sprung = np.zeros(analysis.number_equations, dtype=bool)
+        sprung[spring_dofs] = True
+
+        loads = self.element_loads()
+        stiffness = analysis.element_stiffness
+        cache = TStiffCache()
+        signatures = {}
+
+        self._super_elements = []
+        for group in self.groups:
+            local, pattern = np.unique(equations[group], return_inverse=True)
+            pattern = pattern.reshape(-1, 6)
+            group_use = np.bincount(equations[group].ravel(), minlength=analysis.number_equations)
+
+            free = local < n
+            pattern = np.where(free[pattern], np.cumsum(free)[pattern] - 1, -1)
+            local = local[free]
+            boundary = (use[local] > group_use[local]) | sprung[local]
+
+            signature = (pattern.tobytes(), boundary.tobytes(), cache.round_values(stiffness[group]).tobytes(),
+                         cache.round_values(loads[group]).tobytes())
+
+            self.super_elements.append({"elements": group, "pattern": pattern, "local_boundary": boundary,
+                                        "boundary": local[boundary], "interior": local[~boundary],
+                                        "condensation": signatures.setdefault(signature, len(signatures))})
+
+    def condense(self)->None:
+        """
+        Condenses every distinct substructure, in 'workers' processes
+        """
+        analysis = self.analysis
+        loads = self.element_loads()
+
+        first = {}
+        for super_element in self.super_elements:
+            first.setdefault(super_element["condensation"], super_element)
+
+        tasks = [(analysis.element_stiffness[s["elements"]], loads[s["elements"]], s["pattern"], s["local_boundary"])
+                 for s in first.values()]
+
+        if self.workers and self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                self._condensed = list(pool.map(condense_substructure, tasks))
+        else:
+            self._condensed = [condense_substructure(task) for task in tasks]
+
+    def Run(self)->None:
+        """
+        Condenses the substructures, solves the global system on the retained
+        equations and recovers the interior displacements and element forces
+        """
+        analysis = self.analysis
+        n = analysis.number_free_equations
+        equations = analysis.element_equations
+
+        self.condense()
+
+        retained = np.ones(n, dtype=bool)
+        for super_element in self.super_elements:
+            retained[super_element["interior"]] = False
+        position = np.full(analysis.number_equations, -1)
+        position[:n][retained] = np.arange(retained.sum())
+        nr = int(retained.sum())
+
+        loads = self.element_loads()
+        rows, cols, values = [], [], []
+        FR = np.zeros((nr,) + loads.shape[2:])
+
+        grouped = np.concatenate(self.groups) if self.groups else np.zeros(0, dtype=np.int64)
+        direct = np.setdiff1d(np.arange(equations.shape[0]), grouped)
+        if direct.size:
+            r = position[np.repeat(equations[direct], 6, axis=1).ravel()]
+            c = position[np.tile(equations[direct], (1, 6)).ravel()]
+            keep = (r >= 0) & (c >= 0)
+            rows.append(r[keep]); cols.append(c[keep])
+            values.append(analysis.element_stiffness[direct].ravel()[keep])
+
+            free = position[equations[direct]] >= 0
+            np.add.at(FR, position[equations[direct]][free], loads[direct][free])
+
+        spring_dofs, spring_values = analysis.spring_equations()
+        free = position[spring_dofs] >= 0
+        rows.append(position[spring_dofs][free]); cols.append(position[spring_dofs][free])
+        values.append(spring_values[free])
+
+        for super_element in self.super_elements:
+            Kc, Fc, _, _ = self._condensed[super_element["condensation"]]
+            b = position[super_element["boundary"]]
+            rows.append(np.repeat(b, b.size)); cols.append(np.tile(b, b.size))
+            values.append(Kc.ravel())
+            np.add.at(FR, b, Fc)
+
+        KR = sp.coo_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                           shape=(nr, nr)).tocsr()
+
+        self.solver.factorize(KR)
+        u = self.solver.solve(FR)
+
+        UG = analysis.UG
+        UG[:n][retained] = u
+        for super_element in self.super_elements:
+            _, _, T, u0 = self._condensed[super_element["condensation"]]
+            UG[super_element["interior"]] = u0 + T@UG[super_element["boundary"]]
+
+        analysis.free_solution = UG[:n].copy()
+        analysis.find_element_solution()
+        analysis.FG[...] = 0.0
+        analysis.assemble_stacks(stiffness=False)
+        analysis.find_reactions()
+
+#%% --------------------------
+#       WORKER FUNCTIONS
+# ----------------------------
+def condense_substructure(task:tuple)->tuple[np.ndarray, ...]:
+    """
+    Assembles a substructure on its local free equations and condenses it
+    to the boundary ones. Returns the condensed stiffness and load
+    (K_bb - K_bi K_ii^-1 K_ib, F_b - K_bi K_ii^-1 F_i) and the recovery
+    terms T = -K_ii^-1 K_ib and u0 = K_ii^-1 F_i (u_i = u0 + T u_b)
+    """
+    kel, loads, pattern, boundary = task
+    size = boundary.size
+
+    rows = np.repeat(pattern, 6, axis=1).ravel()
+    cols = np.tile(pattern, (1, 6)).ravel()
+    free = (rows >= 0) & (cols >= 0)
+
+    K = np.zeros((size, size))
+    np.add.at(K, (rows[free], cols[free]), kel.ravel()[free])
+    F = np.zeros((size,) + loads.shape[2:])
+    np.add.at(F, pattern[pattern >= 0], loads[pattern >= 0])
+
+    b, i = np.flatnonzero(boundary), np.flatnonzero(~boundary)
+    Kbb, Kbi, Kib = K[np.ix_(b, b)], K[np.ix_(b, i)], K[np.ix_(i, b)]
+
+    if i.size:
+        factor = cho_factor(K[np.ix_(i, i)])
+        T = -cho_solve(factor, Kib)
+        u0 = cho_solve(factor, F[i])
+    else:
+        T = np.zeros((0, b.size))
+        u0 = np.zeros((0,) + F.shape[1:])
+
+    return Kbb + Kbi@T, F[b] - Kbi@u0, T, u0
@@ -0,0 +1,202 @@
+#%% --------------------------
+#       IMPORTED MODULES
+# ----------------------------
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from TStiffModel import TStiffModel
+from TStiffAnalysis import TStiffAnalysis
+from TStiffSolver import TStiffSolver
+from TStiffKernel import global_stiffness
+
+@dataclass
+class TStiffSweep:
+#%% --------------------------
+#       DOC STRING
+# ----------------------------
+    """
+    Parametric sweep over one frozen frame topology. Node discovery, DoF
+    numbering and the K00 sparsity pattern are computed once; each variant
+    only refills the stiffness values and load vector and solves.
+
+    Provide:
+        - 'model': structure (TStiffModel, or a list of TStiffElement)
+        - 'workers': number of worker processes (0 or 1 runs in this process)
+        - 'chunk_size': number of variants sent to a worker at once
+        - 'solver_method': TStiffSolver method used for every variant
+        - 'reorder': equation renumbering applied once (see TStiffAnalysis)
+
+    Each variant is a dictionary overriding any of the model arrays:
+        - 'sections': (n_sec, 2) section table [area, inertia]
+        - 'materials': (n_mat, 2) material table [E, poisson]
+        - 'section_ids': (m,) section of each element
+        - 'material_ids': (m,) material of each element
+        - 'loads': (m, 6) element load vectors
+
+    'Run' returns the arrays indexed by variant:
+        - 'UG': (n_variants, n_equations) displacements
+        - 'solution': (n_variants, n_elem, 6) element reaction forces
+    """
+#%% --------------------------
+#       INITIALIZER
+# ----------------------------
+    _model: TStiffModel
+    _workers: int = 0
+    _chunk_size: int = 16
+    _solver_method: str = "auto"
+    _reorder: str = None
+    _topology: dict = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if not isinstance(self._model, TStiffModel):
+            self._model = TStiffModel.from_elements(self._model)
+
+        self.freeze()
+
+#%% --------------------------
+#       GETTERS & SETTERS
+# ----------------------------
+    @property
+    def model(self): return self._model
+    @model.setter
+    def model(self, model): self._model = model
+
+    @property
+    def workers(self): return self._workers
+    @workers.setter
+    def workers(self, n): self._workers = n
+
+    @property
+    def chunk_size(self): return self._chunk_size
+    @chunk_size.setter
+    def chunk_size(self, n): self._chunk_size = n
+
+    @property
+    def solver_method(self): return self._solver_method
+    @solver_method.setter
+    def solver_method(self, method): self._solver_method = method
+
+    @property
+    def reorder(self): return self._reorder
+    @reorder.setter
+    def reorder(self, method): self._reorder = method
+
+    @property
+    def topology(self): return self._topology
+
+#%% --------------------------
+#       CLASS METHODS
+# ----------------------------
+    def freeze(self)->None:
+        """
+        Numbers the equations and builds the K00 sparsity pattern once.
+        'inverse' maps every free-free element stiffness term (and spring)
+        to its slot in the CSR data array
+        """
+        analysis = TStiffAnalysis(_model=self.model, _sparse=True, _reorder=self.reorder)
+        analysis.check_for_prescribed_displacements()
+
+        n = analysis.number_free_equations
+        equations = analysis.element_equations
+        spring_dofs, spring_values = analysis.spring_equations()
+        free_springs = spring_dofs < n
+
+        rows = np.concatenate([np.repeat(equations, 6, axis=1).ravel(), spring_dofs[free_springs]])
+        cols = np.concatenate([np.tile(equations, (1, 6)).ravel(), spring_dofs[free_springs]])
+        free = (rows < n) & (cols < n)
+
+        keys, inverse = np.unique(rows[free]*n + cols[free], return_inverse=True)
+        indptr = np.searchsorted(keys//n, np.arange(n + 1)) if n else np.zeros(1, dtype=np.int64)
+
+        L = self.model.lengths()
+        self._topology = {"number_equations": analysis.number_equations,
+                          "number_free_equations": n,
+                          "element_equations": equations,
+                          "prescribed": analysis.UG.copy(),
+                          "constrained": equations >= n,
+                          "length": L,
+                          "angle": self.model.angles(L),
+                          "free": free,
+                          "inverse": inverse,
+                          "indices": keys % n if n else keys,
+                          "indptr": indptr,
+                          "spring_values": spring_values[free_springs],
+                          "sections": self.model.sections,
+                          "materials": self.model.materials,
+                          "section_ids": self.model.section_ids,
+                          "material_ids": self.model.material_ids,
+                          "loads": self.model.loads,
+                          "solver_method": self.solver_method}
+
+    def Run(self, variants:list[dict])->dict[str, np.ndarray]:
+        """
+        Solves every variant, distributing chunks of 'chunk_size' variants
+        over a pool of 'workers' processes
+        """
+        chunks = [variants[i:i + self.chunk_size] for i in range(0, len(variants), self.chunk_size)]
+
+        if self.workers and self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=set_topology,
+                                     initargs=(self.topology,)) as pool:
+                results = list(pool.map(solve_variants, chunks))
+        else:
+            results = [solve_variants(chunk, self.topology) for chunk in chunks]
+
+        UG = [u for chunk_UG, _ in results for u in chunk_UG]
+        solution = [s for _, chunk_solution in results for s in chunk_solution]
+
+        return {"UG": np.array(UG).reshape(len(variants), -1),
+                "solution": np.array(solution).reshape(len(variants), -1, 6)}
+
+#%% --------------------------
+#       WORKER FUNCTIONS
+# ----------------------------
+_topology = {}
+
+def set_topology(topology:dict)->None:
+    """
+    Stores the frozen topology in the worker process
+    """
+    global _topology
+    _topology = topology
+
+def solve_variants(variants:list[dict], topology:dict = None)->tuple[list, list]:
+    """
+    Refills the stiffness values and load vector of each variant
+    and solves it on the frozen 'topology' (default: the one stored in
+    the worker process by set_topology)
+    """
+    t = _topology if topology is None else topology
+    n = t["number_free_equations"]
+    equations = t["element_equations"]
+    free_equations = np.where(equations < n, equations, n)
+    solver = TStiffSolver(_method=t["solver_method"])
+
+    all_UG, all_solution = [], []
+    for variant in variants:
+        sections = np.asarray(variant.get("sections", t["sections"]), dtype=float)
+        materials = np.asarray(variant.get("materials", t["materials"]), dtype=float)
+        section_ids = variant.get("section_ids", t["section_ids"])
+        material_ids = variant.get("material_ids", t["material_ids"])
+        loads = np.asarray(variant.get("loads", t["loads"]), dtype=float)
+
+        E = materials[material_ids, 0]
+        A = sections[section_ids, 0]
+        I = sections[section_ids, 1]
+        _, _, kel = global_stiffness(E, A, I, t["length"], t["angle"])
+
+        values = np.concatenate([kel.ravel(), t["spring_values"]])[t["free"]]
+        data = np.bincount(t["inverse"], weights=values, minlength=t["indices"].size)
+        K00 = sp.csr_matrix((data, t["indices"], t["indptr"]), shape=(n, n))
+        prescribed = np.einsum("eij,ej->ei", kel, t["prescribed"][equations]*t["constrained"])
+        F0 = np.bincount(free_equations.ravel(), weights=(loads - prescribed).ravel(), minlength=n + 1)[:n]
+
+        solver.factorize(K00)
+        UG = t["prescribed"].copy()
+        UG[:n] += solver.solve(F0)
+
+        all_UG.append(UG)
+        all_solution.append(np.einsum("eij,ej->ei", kel, UG[equations]) - loads)
+
+    return all_UG, all_solution